@@ -22,34 +22,46 @@ bl_info = {
     "category" : "BII Tools"
 }
 
-from . import close_mesh_holes
-from . import bii_functions_panel
-from . import bulk_assign_ifc_class
-from . import bulk_material_dropdown
-from . import add_ifc_property
-from . import clean_reduce_ifc
-from . import upgrade_to_IFC4
-from . import export_rail_asset
-from . import fbx_export_preset
+try:
+    import bpy
+except ImportError:
+    # Imported outside of Blender, e.g. by the rail export worker processes
+    bpy = None
+
+if bpy is not None:
+    from . import close_mesh_holes
+    from . import bii_functions_panel
+    from . import bulk_assign_ifc_class
+    from . import validate_bulk
+    from . import bulk_material_dropdown
+    from . import add_ifc_property
+    from . import clean_reduce_ifc
+    from . import generate_lods
+    # Not registered, so not imported while enabling the add-on
+    # from . import upgrade_to_IFC4
+    from . import export_rail_asset
 
 def register():
     close_mesh_holes.register()
     bii_functions_panel.register()
     bulk_assign_ifc_class.register()
+    validate_bulk.register()
     bulk_material_dropdown.register()
     add_ifc_property.register()
     clean_reduce_ifc.register()
+    generate_lods.register()
     # upgrade_to_IFC4.register()
     export_rail_asset.register()
-    fbx_export_preset.register()
 
 def unregister():
     close_mesh_holes.unregister()
     bii_functions_panel.unregister()
     bulk_assign_ifc_class.unregister()
+    validate_bulk.unregister()
     bulk_material_dropdown.unregister()
     add_ifc_property.unregister()
     clean_reduce_ifc.unregister()
+    generate_lods.unregister()
     # upgrade_to_IFC4.unregister()
     export_rail_asset.unregister()
 
@@ -1,62 +1,168 @@
 import bpy
 import bmesh
+import re
+from mathutils import Vector
+from .instrumentation import OperatorRun, instrumented
+from .lazy_import import lazy_import
 
-# Global counter for group naming
-group_counter = 0
+np = lazy_import("numpy")
+ifc_psets = lazy_import(".ifc_psets", __package__)
+spatial_groups = lazy_import(".spatial_groups", __package__)
+
+GROUPING_PSET = "Custom_dProB_Grouping"
+GROUPING_MEASURE_TYPES = {"Grouping": "IfcLabel"}
+
+# The last Group#N number is stored on the IfcProject, so group names
+# stay unique across sessions
+GROUP_COUNTER_PSET = "Custom_dProB_GroupCounter"
+GROUP_COUNTER_PROP = "LastGroup"
+GROUP_NAME = re.compile(r"Group#(\d+)$")
+
+def highest_group_number(ifc_file):
+    # Files grouped before the counter was stored
+    numbers = [0]
+    for prop in ifc_file.by_type("IfcPropertySingleValue"):
+        if prop.Name == "Grouping" and prop.NominalValue is not None:
+            match = GROUP_NAME.match(str(prop.NominalValue.wrappedValue))
+            if match:
+                numbers.append(int(match.group(1)))
+    return max(numbers)
+
+def reserve_group_numbers(ifc_file, count):
+    """
+    Reserve 'count' new group numbers in 'ifc_file'. Returns the first one.
+    """
+    return ifc_psets.reserve_numbers(ifc_file, GROUP_COUNTER_PSET, GROUP_COUNTER_PROP, count,
+                                     lambda: highest_group_number(ifc_file))
+
+def ifc_mesh_elements(objects):
+    # (object, IFC element) of the mesh objects linked to an IFC element
+    import bonsai.tool as tool
+
+    items = []
+    for obj in objects:
+        if obj.type == 'MESH':
+            element = tool.Ifc.get_entity(obj)
+            if element is None:
+                print(f"Object {obj.name} has no IFC object.")
+                continue
+            items.append((obj, element))
+    return items
 
 def set_ifc_property(self, context, property_name):
+    """
+    Put the selected IFC elements into one group: 'property_name' or a
+    new Group#N. Returns the number of elements grouped.
+    """
     try:
-        import ifcopenshell
         import bonsai
         from bonsai.bim.ifc import IfcStore
-        import bonsai.tool as tool
-        from bonsai.bim.module.pset.data import Data as PsetData
-        global group_counter  # Reference the global counter
-        
-        # Increment the group counter
-        group_counter += 1
-        property_name = f"Group#{group_counter}"  # Update property_name with incremented counter
-
-        # Get the active IFC file
-        ifc_file = IfcStore.get_file()
-        if not ifc_file:
-            self.report({'ERROR'}, "No IFC file found. Ensure you're working in a Bonsai project.")
-            return
-        
-        # Loop through all selected objects
-        for obj in bpy.context.selected_objects:
-            if obj.type == 'MESH':
-
-                # Set the active object
-                bpy.context.view_layer.objects.active = obj
-                # get the ifc object
-                ifc_obj = IfcStore.get_file().by_id(obj.BIMObjectProperties.ifc_definition_id)
-                # check if the object is valid
-                if not ifc_obj:
-                    print(f"Object {obj.name} has no IFC object.")
-                    continue
-                pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=ifc_obj, name="Custom_dProB_Grouping")
-
-                # Set the properties of the Pset
-                new_values = {
-                    "Grouping": property_name,
-                }
-                ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties=new_values)
-    except:
+    except ImportError:
         self.report({'ERROR'}, "Bonsai is not installed. Good for you.")
+        return 0
+
+    # Get the active IFC file
+    ifc_file = IfcStore.get_file()
+    if not ifc_file:
+        self.report({'ERROR'}, "No IFC file found. Ensure you're working in a Bonsai project.")
+        return 0
+
+    items = ifc_mesh_elements(context.selected_objects)
+    if not items:
+        return 0
+    property_name = property_name or f"Group#{reserve_group_numbers(ifc_file, 1)}"
+    rows = [(element, {"Grouping": property_name}) for _, element in items]
+    ifc_psets.write_shared_psets(ifc_file, GROUPING_PSET, rows, GROUPING_MEASURE_TYPES)
+    bonsai.bim.handler.refresh_ui_data()
+    return len(rows)
+
+def world_centers(objects):
+    # World space bounding box centers, (N, 3)
+    centers = [obj.matrix_world @ (sum((Vector(corner) for corner in obj.bound_box), Vector()) / 8) for obj in objects]
+    return np.array(centers, dtype=np.float64).reshape(-1, 3)
+
+def auto_group(self, context, method, distance, by_class, run=None):
+    """
+    Group the selected IFC elements by proximity of their bounding box
+    centers, see spatial_groups, and write every group as a new Group#N
+    in one batch. With 'by_class' elements of different IFC classes are
+    never grouped together.
+    Returns (elements, groups), or None without an IFC file.
+    """
+    try:
+        import bonsai
+        from bonsai.bim.ifc import IfcStore
+    except ImportError:
+        self.report({'ERROR'}, "Bonsai is not installed. Good for you.")
+        return None
+
+    ifc_file = IfcStore.get_file()
+    if not ifc_file:
+        self.report({'ERROR'}, "No IFC file found. Ensure you're working in a Bonsai project.")
+        return None
+
+    run = run or OperatorRun(AutoGroupIfcOperator.bl_label)
+    with run.stage("index"):
+        items = ifc_mesh_elements(context.selected_objects)
+        if not items:
+            return 0, 0
+        centers = world_centers([obj for obj, _ in items])
+        classes = None
+        if by_class:
+            codes = {}
+            classes = [codes.setdefault(element.is_a(), len(codes)) for _, element in items]
+
+    with run.stage("cluster"):
+        if method == 'GRID':
+            labels = spatial_groups.grid_groups(centers, distance, classes)
+        else:
+            labels = spatial_groups.proximity_groups(centers, distance, classes)
+
+    groups = int(labels.max()) + 1
+    with run.stage("psets"):
+        first = reserve_group_numbers(ifc_file, groups)
+        rows = [(element, {"Grouping": f"Group#{first + label}"}) for (_, element), label in zip(items, labels.tolist())]
+        ifc_psets.write_shared_psets(ifc_file, GROUPING_PSET, rows, GROUPING_MEASURE_TYPES)
+        bonsai.bim.handler.refresh_ui_data()
+
+    run.count(objects=len(items), groups=groups)
+    print(f"Grouped {len(items)} elements into Group#{first} to Group#{first + groups - 1}.")
+    return len(items), groups
 
 class SetIfcPropForGroup(bpy.types.Operator):
     """Set custom ifc property for grouping"""
     bl_idname = "object.set_ifc_group_property_operator"
     bl_label = "Set Group Property for selected"
 
-    def execute(self, context):     
-        set_ifc_property(self, context, None)
+    @instrumented
+    def execute(self, context):
+        with self._run.stage("psets"):
+            grouped = set_ifc_property(self, context, None)
+        self._run.count(objects=grouped)
         return {'FINISHED'}
 
+class AutoGroupIfcOperator(bpy.types.Operator):
+    """Group the selected IFC elements by proximity and write Custom_dProB_Grouping for all of them at once"""
+    bl_idname = "object.auto_group_ifc_operator"
+    bl_label = "Auto Group Selected"
+
+    @instrumented
+    def execute(self, context):
+        wm = context.window_manager
+        result = auto_group(self, context, wm.group_method, wm.group_distance, wm.group_by_class, self._run)
+        if result is None:
+            return {'CANCELLED'}
+        elements, groups = result
+        if not elements:
+            self.report({'INFO'}, "No IFC mesh objects selected.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Grouped {elements} elements into {groups} groups.")
+        return {'FINISHED'}
 
 def register():
     bpy.utils.register_class(SetIfcPropForGroup)
+    bpy.utils.register_class(AutoGroupIfcOperator)
 
 def unregister():
-    bpy.utils.unregister_class(SetIfcPropForGroup)
\ No newline at end of file
+    bpy.utils.unregister_class(SetIfcPropForGroup)
+    bpy.utils.unregister_class(AutoGroupIfcOperator)
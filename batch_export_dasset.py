@@ -0,0 +1,187 @@
+"""
+Headless batch export of .blend files to dProB Rail Assets (.dasset).
+
+Run from a shell, every input may be a .blend file, a directory or a glob:
+
+    blender --background --python batch_export_dasset.py -- \
+        projects/line_4/*.blend --output-dir out --jobs 4 \
+        --east 32500000 --north 5800000 --resolution 5
+
+Each .blend file is exported by its own 'blender --background' process,
+up to --jobs of them at once. A JSON summary with per-file timings and
+rail counts is written to --summary (default: <output-dir>/dasset_summary.json).
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_PREFIX = "DASSET_RESULT "
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="batch_export_dasset.py", description="Export .blend files to .dasset")
+    parser.add_argument("inputs", nargs="*", help=".blend files, directories or glob patterns")
+    parser.add_argument("--output-dir", help="Directory for the .dasset files (default: next to each .blend)")
+    parser.add_argument("--summary", help="Path of the JSON summary")
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 1) // 2), help="Blender processes at once")
+    parser.add_argument("--blender", help="Blender executable (default: the running Blender)")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per file")
+    parser.add_argument("--east", type=float, default=0.0)
+    parser.add_argument("--north", type=float, default=0.0)
+    parser.add_argument("--elevation", type=float, default=0.0)
+    parser.add_argument("--no-apply-geolocation", dest="apply_geolocation", action="store_false")
+    parser.add_argument("--resolution", dest="handle_distance", type=float, default=5.0)
+    parser.add_argument("--merge-threshold", type=float, default=0.1)
+    parser.add_argument("--selected-only", dest="export_selected_only", action="store_true",
+                        help="Export only the objects selected in the saved file (default: all curves)")
+    parser.add_argument("--max-deviation", type=float, default=None,
+                        help="Place handles adaptively, keeping the spline within this many meters")
+    parser.add_argument("--workers", type=int, default=1, help="Sampling processes per Blender process")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false")
+    parser.add_argument("--cache-size-mb", type=int, default=512)
+    parser.add_argument("--compact", dest="compact_json", action="store_true")
+    parser.add_argument("--precision", type=int, default=3, help="Decimals of the handle coordinates, -1 = full precision")
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def script_args():
+    # Blender passes everything after '--' through to the script
+    return sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+def collect_blend_files(inputs):
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.blend"))
+        else:
+            matches = glob.glob(pattern)
+        files.extend(os.path.abspath(path) for path in sorted(matches) if path.endswith(".blend"))
+    # Keep the order, drop duplicates
+    return list(dict.fromkeys(files))
+
+def run_worker(args):
+    """
+    Export the currently loaded .blend file. Runs inside a
+    'blender --background <file> --python ...' process.
+    """
+    import bpy
+
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    export_rail_asset = importlib.import_module(os.path.basename(ADDON_DIR) + ".export_rail_asset")
+
+    options = SimpleNamespace(
+        filepath=args.worker_output,
+        export_selected_only=args.export_selected_only,
+        east=args.east,
+        north=args.north,
+        elevation=args.elevation,
+        apply_geolocation=args.apply_geolocation,
+        handle_distance=args.handle_distance,
+        merge_threshold=args.merge_threshold,
+        adaptive_handles=args.max_deviation is not None,
+        max_deviation=args.max_deviation or 0.0,
+        workers=args.workers,
+        use_cache=args.use_cache,
+        cache_size_mb=args.cache_size_mb,
+        compact_json=args.compact_json,
+        precision=args.precision,
+    )
+
+    start = time.perf_counter()
+    stats = export_rail_asset.export_dasset(bpy.context, options)
+    stats["export_seconds"] = time.perf_counter() - start
+    print(RESULT_PREFIX + json.dumps(stats), flush=True)
+
+def export_file(blend_path, args, blender):
+    """
+    Export one .blend file in its own Blender process and return its
+    summary entry.
+    """
+    output_dir = os.path.abspath(args.output_dir) if args.output_dir else os.path.dirname(blend_path)
+    output = os.path.join(output_dir, os.path.splitext(os.path.basename(blend_path))[0] + ".dasset")
+
+    command = [blender, "--background", blend_path, "--python-exit-code", "1",
+               "--python", os.path.abspath(__file__), "--", "--worker-output", output]
+    for name in ("east", "north", "elevation", "merge_threshold", "workers", "cache_size_mb", "precision"):
+        command += ["--" + name.replace("_", "-"), str(getattr(args, name))]
+    command += ["--resolution", str(args.handle_distance)]
+    if args.max_deviation is not None:
+        command += ["--max-deviation", str(args.max_deviation)]
+    if not args.apply_geolocation:
+        command.append("--no-apply-geolocation")
+    if args.export_selected_only:
+        command.append("--selected-only")
+    if not args.use_cache:
+        command.append("--no-cache")
+    if args.compact_json:
+        command.append("--compact")
+
+    entry = {"blend": blend_path, "output": output}
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        entry.update(status="timeout", seconds=time.perf_counter() - start)
+        return entry
+    entry["seconds"] = time.perf_counter() - start
+
+    results = [line[len(RESULT_PREFIX):] for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if process.returncode != 0 or not results:
+        entry.update(status="failed", returncode=process.returncode, log=(process.stdout + process.stderr)[-2000:])
+    else:
+        entry.update(status="ok", **json.loads(results[-1]))
+        entry["output_bytes"] = os.path.getsize(output)
+    return entry
+
+def run_batch(args):
+    files = collect_blend_files(args.inputs)
+    if not files:
+        print("No .blend files found.")
+        return 1
+
+    blender = args.blender
+    if blender is None:
+        try:
+            import bpy
+            blender = bpy.app.binary_path
+        except ImportError:
+            blender = "blender"
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = args.summary or os.path.join(args.output_dir or os.getcwd(), "dasset_summary.json")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        entries = list(pool.map(lambda path: export_file(path, args, blender), files))
+
+    for entry in entries:
+        print(f"{entry['status']:>8}  {entry['seconds']:8.2f}s  {entry.get('rails', '-'):>6} rail(s)  {entry['blend']}")
+
+    summary = {
+        "files": entries,
+        "total_seconds": time.perf_counter() - start,
+        "total_rails": sum(entry.get("rails", 0) for entry in entries),
+        "failed": sum(entry["status"] != "ok" for entry in entries),
+    }
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=4)
+    print(f"Summary written to {summary_path}")
+    return 1 if summary["failed"] else 0
+
+def main():
+    args = parse_args(script_args())
+    if args.worker_output:
+        run_worker(args)
+    else:
+        sys.exit(run_batch(args))
+
+if __name__ == "__main__":
+    main()
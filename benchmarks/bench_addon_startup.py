@@ -0,0 +1,143 @@
+"""
+Benchmark how long enabling the add-on takes in a fresh background
+Blender session, and check that it loads no heavy modules and touches no
+files while doing so. Each run starts its own Blender process:
+
+    python benchmarks/bench_addon_startup.py --blender /path/to/blender --runs 10
+    python benchmarks/bench_addon_startup.py --save-baseline startup_baseline.json
+    python benchmarks/bench_addon_startup.py --baseline startup_baseline.json
+
+Inside Blender the add-on package is imported and registered like
+addon_utils.enable does, timed separately. Files opened or directories
+created meanwhile are recorded with an audit hook; Python sources and
+compiled modules read by the import itself are not counted. The exit
+code is 1 if the enable time regressed beyond --tolerance, or if any
+file access or heavy module import happened.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "STARTUP_RESULT "
+
+# Modules that must only be loaded once an operator runs
+HEAVY_MODULES = ["numpy", "ifcopenshell", "bonsai", "multiprocessing", "logging.handlers", "cProfile"]
+
+# Files read by the import system itself
+MODULE_SUFFIXES = (".py", ".pyc", ".so", ".pyd")
+
+def measure_enable():
+    """
+    Import and register the add-on. Runs inside
+    'blender --background --python bench_addon_startup.py -- --measure'.
+    """
+    import importlib
+    from importlib.util import _LazyModule
+
+    accesses = []
+
+    def audit(event, args):
+        if event == "open":
+            path, mode = args[0], args[1]
+            if isinstance(path, (str, bytes)) and not os.fsdecode(path).endswith(MODULE_SUFFIXES):
+                accesses.append(f"open {os.fsdecode(path)} ({mode or 'r'})")
+        elif event == "os.mkdir":
+            accesses.append(f"mkdir {os.fsdecode(args[0])}")
+
+    package = os.path.basename(ADDON_DIR)
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    before = set(sys.modules)
+
+    sys.addaudithook(audit)
+    start = time.perf_counter()
+    addon = importlib.import_module(package)
+    imported = time.perf_counter()
+    addon.register()
+    registered = time.perf_counter()
+    recorded = list(accesses)
+
+    # Lazily imported modules are in sys.modules, but their body has not run yet
+    loaded = [name for name in set(sys.modules) - before
+              if not isinstance(sys.modules[name], _LazyModule)]
+    heavy = sorted(name for name in loaded
+                   if any(name == module or name.startswith(module + ".") for module in HEAVY_MODULES))
+    submodules = sorted(name for name in loaded if name.startswith(package + "."))
+
+    addon.unregister()
+    print(RESULT_PREFIX + json.dumps({
+        "import_seconds": imported - start,
+        "register_seconds": registered - imported,
+        "enable_seconds": registered - start,
+        "heavy_modules": heavy,
+        "submodules": submodules,
+        "file_accesses": recorded,
+    }))
+
+def run_blender(blender):
+    command = [blender, "--background", "--factory-startup", "--python-exit-code", "1",
+               "--python", os.path.abspath(__file__), "--", "--measure"]
+    start = time.perf_counter()
+    process = subprocess.run(command, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            result["process_seconds"] = seconds
+            return result
+    raise RuntimeError(f"Blender exited with {process.returncode}:\n{process.stderr[-2000:] or process.stdout[-2000:]}")
+
+def summarize(results):
+    # Median of the timings, the module and file lists of the first run
+    summary = {key: statistics.median(result[key] for result in results)
+               for key in ("import_seconds", "register_seconds", "enable_seconds", "process_seconds")}
+    for key in ("heavy_modules", "submodules", "file_accesses"):
+        summary[key] = results[0][key]
+    return summary
+
+def main():
+    if "--measure" in sys.argv:
+        measure_enable()
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blender", default="blender", help="Blender executable")
+    parser.add_argument("--runs", type=int, default=5, help="Blender sessions, the median is reported")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    summary = summarize([run_blender(args.blender) for _ in range(args.runs)])
+    for key in ("import_seconds", "register_seconds", "enable_seconds", "process_seconds"):
+        print(f"{key:>17}: {summary[key] * 1000:8.1f} ms")
+    print(f"       submodules: {', '.join(summary['submodules'])}")
+    print(f"    heavy modules: {', '.join(summary['heavy_modules']) or 'none'}")
+    print(f"    file accesses: {len(summary['file_accesses'])}")
+    for access in summary["file_accesses"]:
+        print(f"        {access}")
+
+    failed = bool(summary["heavy_modules"] or summary["file_accesses"])
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # Sub-5 ms differences are noise
+        slower = (summary["enable_seconds"] > baseline["enable_seconds"] * (1 + args.tolerance)
+                  and summary["enable_seconds"] - baseline["enable_seconds"] > 0.005)
+        print(f"Enable: {baseline['enable_seconds'] * 1000:.1f} -> {summary['enable_seconds'] * 1000:.1f} ms"
+              f"{'  SLOWER' if slower else ''}")
+        failed = failed or slower
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"Baseline written to {args.save_baseline}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
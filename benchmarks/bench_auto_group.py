@@ -0,0 +1,79 @@
+"""
+Benchmark the auto grouping of IFC elements for Custom_dProB_Grouping:
+clustering of N element centers with spatial_groups, then writing the
+groups with ifc_psets.write_shared_psets to an in-memory IFC file, once
+fresh and once regrouping the same elements. Needs ifcopenshell, not
+Blender:
+
+    python benchmarks/bench_auto_group.py --elements 50000 --distance 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import ifcopenshell
+import ifcopenshell.api
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ifc_psets import reserve_numbers, write_shared_psets
+from spatial_groups import grid_groups, proximity_groups
+
+CLASSES = ["IfcWall", "IfcSlab", "IfcColumn", "IfcBeam", "IfcBuildingElementProxy"]
+
+def make_file(elements, seed):
+    """
+    In-memory IFC file with 'elements' products and their centers: a
+    site of 2 km with clusters of elements around 2000 places.
+    """
+    rng = np.random.default_rng(seed)
+    ifc_file = ifcopenshell.api.run("project.create_file", version="IFC4")
+    ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcProject", name="Benchmark")
+    classes = rng.integers(0, len(CLASSES), elements)
+    products = [ifc_file.create_entity(CLASSES[code], GlobalId=ifcopenshell.guid.new(), Name=f"Element {i}")
+                for i, code in enumerate(classes.tolist())]
+    places = rng.uniform(0.0, 2000.0, (2000, 3)) * [1.0, 1.0, 0.02]
+    centers = places[rng.integers(0, len(places), elements)] + rng.normal(0.0, 3.0, (elements, 3))
+    return ifc_file, products, centers, classes
+
+def group(ifc_file, products, centers, classes, args):
+    timings = {}
+    start = time.perf_counter()
+    if args.method == "grid":
+        labels = grid_groups(centers, args.distance, classes)
+    else:
+        labels = proximity_groups(centers, args.distance, classes)
+    timings["cluster"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    groups = int(labels.max()) + 1
+    first = reserve_numbers(ifc_file, "Custom_dProB_GroupCounter", "LastGroup", groups)
+    rows = [(product, {"Grouping": f"Group#{first + label}"}) for product, label in zip(products, labels.tolist())]
+    write_shared_psets(ifc_file, "Custom_dProB_Grouping", rows, {"Grouping": "IfcLabel"})
+    timings["psets"] = time.perf_counter() - start
+    return groups, first, timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--elements", type=int, default=50000)
+    parser.add_argument("--distance", type=float, default=5.0, help="Linking distance or grid cell size")
+    parser.add_argument("--method", choices=["proximity", "grid"], default="proximity")
+    parser.add_argument("--mix-classes", action="store_true", help="Group elements of different classes together")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ifc_file, products, centers, classes = make_file(args.elements, args.seed)
+    if args.mix_classes:
+        classes = None
+
+    for label in ("fresh", "regroup"):
+        groups, first, timings = group(ifc_file, products, centers, classes, args)
+        total = sum(timings.values())
+        psets = len(ifc_file.by_type("IfcPropertySet"))
+        print(f"{label:>8}: {total:8.3f}s (cluster {timings['cluster']:.3f}s, psets {timings['psets']:.3f}s)  "
+              f"{groups} groups from Group#{first}, {psets} property sets in the file")
+
+if __name__ == "__main__":
+    main()
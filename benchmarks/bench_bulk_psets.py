@@ -0,0 +1,76 @@
+"""
+Benchmark the dProB_Bulk property set writes against an in-memory IFC
+file with N products, per-product pset.add_pset/pset.edit_pset calls
+versus ifc_psets.write_shared_psets. Needs ifcopenshell, not Blender.
+With all values distinct (the default) every product still gets its own
+property set and most of the time goes to pset.add_pset, so the batch
+only saves the repeated property values; --distinct shows the shared case:
+
+    python benchmarks/bench_bulk_psets.py --products 5000
+    python benchmarks/bench_bulk_psets.py --products 5000 --distinct 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ifcopenshell
+import ifcopenshell.api
+
+from ifc_psets import ensure_pset_template, write_shared_psets
+
+PROP_TEMPLATES = [
+    {"name": "BulkMaterial"},
+    {"name": "BulkVolume", "primary_measure_type": "IfcVolumeMeasure"},
+    {"name": "BulkHeight", "primary_measure_type": "IfcLengthMeasure"},
+]
+
+MEASURE_TYPES = {"BulkMaterial": "IfcLabel", "BulkVolume": "IfcVolumeMeasure", "BulkHeight": "IfcLengthMeasure"}
+
+def make_file(products):
+    ifc_file = ifcopenshell.api.run("project.create_file", version="IFC4")
+    ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcProject", name="Benchmark")
+    elements = [
+        ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcBuilding", name=f"Bulk {i}")
+        for i in range(products)
+    ]
+    return ifc_file, elements
+
+def make_rows(elements, distinct):
+    rng = random.Random(0)
+    values = [(round(rng.uniform(1, 500), 3), round(rng.uniform(0.1, 3), 3)) for _ in range(distinct)]
+    rows = []
+    for i, element in enumerate(elements):
+        volume, height = values[i % distinct]
+        rows.append((element, {"BulkMaterial": "Gleisschotter (Neu)", "BulkVolume": volume, "BulkHeight": height}))
+    return rows
+
+def per_product(ifc_file, rows):
+    for element, values in rows:
+        pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=element, name="dProB_Bulk")
+        ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties=values)
+
+def batched(ifc_file, rows):
+    ensure_pset_template(ifc_file, "dProB_Bulk", PROP_TEMPLATES)
+    write_shared_psets(ifc_file, "dProB_Bulk", rows, MEASURE_TYPES)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=None, help="Distinct (volume, height) pairs (default: all distinct)")
+    args = parser.parse_args()
+
+    for label, write in (("per product", per_product), ("batched", batched)):
+        ifc_file, elements = make_file(args.products)
+        rows = make_rows(elements, args.distinct or args.products)
+        start = time.perf_counter()
+        write(ifc_file, rows)
+        seconds = time.perf_counter() - start
+        entities = len(ifc_file.by_type("IfcPropertySet")) + len(ifc_file.by_type("IfcPropertySingleValue"))
+        print(f"{label:>12}: {seconds:8.3f}s  {args.products / seconds:10.0f} products/s  {entities} pset/property entities")
+
+if __name__ == "__main__":
+    main()
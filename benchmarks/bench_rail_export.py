@@ -0,0 +1,222 @@
+"""
+Benchmark the numeric stages of the rail export on a synthetic rail
+network and compare them against a stored baseline. The network is
+generated as plain (points, edges) arrays; rail_geometry.py and
+dasset_writer.py do not import bpy or mathutils, so no Blender needed:
+
+    python benchmarks/bench_rail_export.py --km 200 --junctions 50 --density 1
+    python benchmarks/bench_rail_export.py --save-baseline rail_baseline.json
+    python benchmarks/bench_rail_export.py --baseline rail_baseline.json
+
+Every stage is timed (best of --repeat) and then run once more under
+tracemalloc for its peak memory. With --baseline the exit code is 1 if a
+stage got slower or needs more memory than --tolerance allows, or if its
+output size changed.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dasset_writer import rail_dicts, write_dasset
+from rail_geometry import add_margins, polylines_from_edges, resample_polylines, simplify_handles
+
+# Separately modelled segments of a track, their endpoints are coincident
+SEGMENT_METERS = 1000.0
+
+def make_track(rng, start, heading, meters, spacing):
+    """
+    Points of a track of 'meters' length from 'start': straights and
+    curves of 300-3000 m radius with a gentle gradient.
+    """
+    count = max(2, int(meters / spacing) + 1)
+    turn = np.zeros(count - 1)
+    position = 0
+    while position < len(turn):
+        length = int(rng.uniform(200.0, 2000.0) / spacing) + 1
+        if rng.random() < 0.5:
+            turn[position:position + length] = spacing / (rng.uniform(300.0, 3000.0) * rng.choice([-1, 1]))
+        position += length
+    headings = heading + np.cumsum(turn)
+    steps = np.stack([np.cos(headings), np.sin(headings), np.full(len(headings), 0.002)], axis=1) * spacing
+    return np.vstack((start, start + np.cumsum(steps, axis=0))), headings[-1]
+
+def add_track(points, edges, track, first=None):
+    """
+    Append 'track' as chains of SEGMENT_METERS, every segment with its own
+    endpoint vertices. 'first' reuses an existing vertex as the start,
+    making it a junction.
+    """
+    spacing = np.linalg.norm(track[1] - track[0])
+    per_segment = max(1, int(SEGMENT_METERS / spacing))
+    offset = sum(len(p) for p in points)
+    indices = np.arange(len(track)) + offset
+    if first is not None:
+        indices[0] = first
+    points.append(track if first is None else track[1:])
+    if first is not None:
+        indices[1:] -= 1
+
+    for start in range(0, len(track) - 1, per_segment):
+        chain = indices[start:start + per_segment + 1].copy()
+        if start:
+            # Duplicate the start vertex, to be snapped back by the export
+            points.append(track[start:start + 1])
+            chain[0] = sum(len(p) for p in points) - 1
+        edges.append(np.stack((chain[:-1], chain[1:]), axis=1))
+
+def make_network(km, junctions, density, seed=0):
+    """
+    Synthetic rail network of 'km' track kilometres as (points, edges):
+    a main line and 'junctions' branches diverging from it, sampled with
+    'density' vertices per metre.
+    """
+    rng = np.random.default_rng(seed)
+    spacing = 1.0 / density
+    points, edges = [], []
+    branch_km = km * 0.3 / junctions if junctions else 0.0
+    main, _ = make_track(rng, np.zeros(3), 0.0, (km - branch_km * junctions) * 1000.0, spacing)
+    add_track(points, edges, main)
+
+    for vertex in rng.choice(np.arange(1, len(main) - 1), size=min(junctions, len(main) - 2), replace=False):
+        heading = np.arctan2(*(main[vertex + 1] - main[vertex])[1::-1]) + rng.choice([-1, 1]) * 0.05
+        branch, _ = make_track(rng, main[vertex], heading, branch_km * 1000.0, spacing)
+        add_track(points, edges, branch, first=int(vertex))
+
+    return np.concatenate(points), np.concatenate(edges)
+
+def run_stages(jobs, args):
+    """
+    The export pipeline stage by stage. Returns a list of
+    (stage name, callable, input) where every callable takes the output
+    of the previous stage, and a function giving the output size.
+    """
+    def extract(jobs):
+        return [polylines_from_edges(points, edges, distance=args.merge_threshold) for points, edges in jobs]
+
+    # The extracted polylines, simplify_handles checks the handles against them
+    sources = []
+
+    def resample(per_job):
+        sources[:] = [pl for polylines in per_job for pl in polylines]
+        return resample_polylines(sources, args.resolution)
+
+    def simplify(polylines):
+        return simplify_handles(polylines, args.max_deviation, sources=sources) if args.max_deviation else polylines
+
+    def margins(polylines):
+        return [add_margins(pl) for pl in polylines]
+
+    def write(rails):
+        path = os.path.join(args.tmp, "bench.dasset")
+        precision = args.precision if args.precision >= 0 else None
+        return write_dasset(path, "bench", {"East": 0.0, "Elevation": 0.0, "North": 0.0},
+                            rail_dicts([("Rail", rails)]), compact=args.compact, precision=precision)["bytes"]
+
+    def points_of(polylines):
+        return sum(len(pl) for pl in polylines)
+
+    return [
+        ("extract", extract, lambda out: sum(points_of(polylines) for polylines in out), "points"),
+        ("resample", resample, points_of, "points"),
+        ("simplify", simplify, points_of, "points"),
+        ("margins", margins, points_of, "points"),
+        ("write", write, lambda size: size, "bytes"),
+    ]
+
+def measure(jobs, args):
+    results = {}
+    data = jobs
+    for name, stage, size_of, unit in run_stages(jobs, args):
+        seconds = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            output = stage(data)
+            seconds = min(seconds, time.perf_counter() - start)
+
+        tracemalloc.start()
+        stage(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {"seconds": seconds, "peak_mb": peak / 1024 / 1024, "output": size_of(output), "unit": unit}
+        data = output
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Print the stages next to the baseline. Returns the regressed stages.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        # Sub-10 ms stages are too noisy for a relative limit
+        slower = result["seconds"] > base["seconds"] * (1 + tolerance) and result["seconds"] - base["seconds"] > 0.01
+        bigger = result["peak_mb"] > base["peak_mb"] * (1 + tolerance) and result["peak_mb"] - base["peak_mb"] > 1.0
+        changed = result["output"] != base["output"]
+        flags = [flag for flag, hit in (("SLOWER", slower), ("MEMORY", bigger), ("OUTPUT", changed)) if hit]
+        if flags:
+            regressions.append(name)
+        print(f"{name:>10}: {base['seconds']:8.3f}s -> {result['seconds']:8.3f}s  "
+              f"{base['peak_mb']:8.1f} -> {result['peak_mb']:8.1f} MB  "
+              f"{base['output']} -> {result['output']} {result['unit']}  {' '.join(flags)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--km", type=float, default=100.0, help="Track kilometres in total")
+    parser.add_argument("--junctions", type=int, default=20, help="Branches per network")
+    parser.add_argument("--density", type=float, default=1.0, help="Vertices per metre")
+    parser.add_argument("--objects", type=int, default=10, help="Networks (objects) the kilometres are split into")
+    parser.add_argument("--resolution", type=float, default=5.0)
+    parser.add_argument("--merge-threshold", type=float, default=0.1)
+    parser.add_argument("--max-deviation", type=float, default=None, help="Enable adaptive handles")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--precision", type=int, default=3, help="Decimals of the handle coordinates, -1 = full precision")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown/memory growth")
+    args = parser.parse_args()
+
+    params = {key: getattr(args, key) for key in
+              ("km", "junctions", "density", "objects", "resolution", "merge_threshold", "max_deviation", "compact", "precision", "seed")}
+    jobs = [make_network(args.km / args.objects, args.junctions, args.density, args.seed + i) for i in range(args.objects)]
+    print(f"{args.km:g} km, {args.objects} networks, {sum(len(p) for p, _ in jobs)} vertices, {sum(len(e) for _, e in jobs)} edges")
+
+    with tempfile.TemporaryDirectory() as args.tmp:
+        results = measure(jobs, args)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["params"] != params:
+            print(f"Warning: baseline was recorded with {baseline['params']}")
+        regressions = compare(results, baseline["stages"], args.tolerance)
+    else:
+        for name, result in results.items():
+            print(f"{name:>10}: {result['seconds']:8.3f}s  {result['peak_mb']:8.1f} MB  {result['output']} {result['unit']}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"params": params, "stages": results}, f, indent=4)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if regressions:
+        print(f"Regressions in: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import bpy
+from .instrumentation import summary_lines
 
 class BiiFunctionsPanel(bpy.types.Panel):
     """Creates a Panel in the Object properties window"""
@@ -10,6 +11,7 @@ class BiiFunctionsPanel(bpy.types.Panel):
 
     def draw(self, context):
         layout = self.layout
+        wm = context.window_manager
 
         # Add a short description of the panel
         row1 = layout.row(align = True)
@@ -20,26 +22,135 @@ class BiiFunctionsPanel(bpy.types.Panel):
 
         layout.prop(context.scene, "bulk_material", text="Bulk Material")
         layout.operator("object.set_ifc_class_for_bulk_operator")
+        layout.operator("object.validate_bulk_operator")
         layout.operator("object.set_ifc_group_property_operator")
+        layout.prop(wm, "group_method", text="Grouping")
+        layout.prop(wm, "group_distance", text="Cell Size" if wm.group_method == 'GRID' else "Distance")
+        layout.prop(wm, "group_by_class", text="Separate IFC Classes")
+        layout.operator("object.auto_group_ifc_operator")
 
         layout.label(text="Clean and reduce Model")
 
         # layout.operator("object.upgrade_ifc_operator")
 
-        layout.prop(context.window_manager, "decimate_ratio", text="Decimate Ratio")
+        layout.prop(wm, "reduce_mode", text="Reduce")
+        if wm.reduce_mode == 'RATIO':
+            layout.prop(wm, "decimate_ratio", text="Decimate Ratio")
+        elif wm.reduce_mode == 'BUDGET':
+            layout.prop(wm, "triangle_budget", text="Triangle Budget")
+        else:
+            layout.prop(wm, "max_error", text="Max Error")
+        layout.prop(context.window_manager, "deduplicate_meshes", text="Deduplicate Meshes")
+        layout.prop(context.window_manager, "clean_shards", text="Worker Processes")
         layout.operator("object.clean_reduce_ifc_operator")
         layout.label(text="Progress:")
         layout.label(text=context.scene.clean_progress)
 
+        layout.label(text="LODs")
+        layout.prop(wm, "lod_mode", text="Targets")
+        if wm.lod_mode == 'SCREEN':
+            layout.prop(wm, "lod_screen_sizes", text="Screen Size LOD1-3")
+        else:
+            layout.prop(wm, "lod_errors", text="Max Error LOD1-3")
+        layout.prop(wm, "lod_deduplicate", text="Deduplicate Meshes")
+        layout.operator("object.generate_lods_operator")
+
+        layout.label(text="Diagnostics")
+        row = layout.row(align = True)
+        row.prop(wm, "bii_trace_memory", text="Peak Memory")
+        row.prop(wm, "bii_profile", text="Profile")
+        for line in summary_lines():
+            layout.label(text=line)
+
 
 def register():
     bpy.utils.register_class(BiiFunctionsPanel)
     bpy.types.WindowManager.decimate_ratio = bpy.props.FloatProperty(
         name="Decimate Ratio",
         default=1.0, min=0.1, max=1.0)
+    bpy.types.WindowManager.reduce_mode = bpy.props.EnumProperty(
+        name="Reduce Mode",
+        items=[
+            ('RATIO', "Ratio", "Decimate every mesh by the same ratio"),
+            ('BUDGET', "Triangle Budget", "Decimate each mesh so all selected objects together stay within a triangle budget"),
+            ('ERROR', "Max Error", "Decimate each mesh as far as the estimated geometric error allows"),
+        ],
+        default='RATIO')
+    bpy.types.WindowManager.triangle_budget = bpy.props.IntProperty(
+        name="Triangle Budget",
+        description="Total triangles of all selected objects after reducing",
+        default=1000000, min=1000)
+    bpy.types.WindowManager.max_error = bpy.props.FloatProperty(
+        name="Max Error",
+        description="Largest estimated geometric error per mesh",
+        default=0.01, min=0.0001, soft_max=1.0, subtype='DISTANCE', unit='LENGTH')
+    bpy.types.WindowManager.deduplicate_meshes = bpy.props.BoolProperty(
+        name="Deduplicate Meshes",
+        description="Link geometrically identical meshes to one mesh before cleaning and reducing. Moves the origins of the affected objects",
+        default=False)
+    bpy.types.WindowManager.clean_shards = bpy.props.IntProperty(
+        name="Worker Processes",
+        description="Split the meshes into shards reduced by headless Blender processes (1 = reduce in this session)",
+        default=1, min=1, max=64)
     bpy.types.Scene.clean_progress = bpy.props.StringProperty(default="Ready to clean and reduce Model")
+    bpy.types.WindowManager.lod_mode = bpy.props.EnumProperty(
+        name="LOD Targets",
+        items=[
+            ('SCREEN', "Screen Size", "Switch LOD levels at a fraction of the screen height"),
+            ('ERROR', "Max Error", "Reduce every LOD level up to a geometric error"),
+        ],
+        default='SCREEN')
+    bpy.types.WindowManager.lod_screen_sizes = bpy.props.FloatVectorProperty(
+        name="LOD Screen Sizes",
+        description="Fraction of the screen height covered by the object when LOD1, LOD2 and LOD3 are switched in",
+        size=3, default=(0.5, 0.25, 0.1), min=0.001, max=1.0)
+    bpy.types.WindowManager.lod_errors = bpy.props.FloatVectorProperty(
+        name="LOD Errors",
+        description="Largest estimated geometric error of LOD1, LOD2 and LOD3",
+        size=3, default=(0.01, 0.05, 0.2), min=0.0001, unit='LENGTH')
+    bpy.types.WindowManager.lod_deduplicate = bpy.props.BoolProperty(
+        name="Deduplicate Meshes",
+        description="Link geometrically identical meshes to one mesh before generating LODs. Moves the origins of the affected objects",
+        default=False)
+    bpy.types.WindowManager.group_method = bpy.props.EnumProperty(
+        name="Grouping Method",
+        items=[
+            ('PROXIMITY', "Proximity", "Group elements whose bounding box centers are within the distance of each other, transitively"),
+            ('GRID', "Grid", "Group elements whose bounding box centers fall into the same grid cell"),
+        ],
+        default='PROXIMITY')
+    bpy.types.WindowManager.group_distance = bpy.props.FloatProperty(
+        name="Grouping Distance",
+        description="Linking distance of the proximity grouping, cell size of the grid grouping",
+        default=5.0, min=0.01, subtype='DISTANCE', unit='LENGTH')
+    bpy.types.WindowManager.group_by_class = bpy.props.BoolProperty(
+        name="Separate IFC Classes",
+        description="Only group elements of the same IFC class",
+        default=True)
+    bpy.types.WindowManager.bii_trace_memory = bpy.props.BoolProperty(
+        name="Trace Memory",
+        description="Record the peak Python memory of every operator run with tracemalloc (slows runs down)",
+        default=False)
+    bpy.types.WindowManager.bii_profile = bpy.props.BoolProperty(
+        name="Profile",
+        description="Capture a cProfile of every operator run next to the run log",
+        default=False)
 
 def unregister():
     bpy.utils.unregister_class(BiiFunctionsPanel)
     del bpy.types.WindowManager.decimate_ratio
-    del bpy.types.Scene.clean_progress
\ No newline at end of file
+    del bpy.types.WindowManager.reduce_mode
+    del bpy.types.WindowManager.triangle_budget
+    del bpy.types.WindowManager.max_error
+    del bpy.types.WindowManager.deduplicate_meshes
+    del bpy.types.WindowManager.clean_shards
+    del bpy.types.Scene.clean_progress
+    del bpy.types.WindowManager.lod_mode
+    del bpy.types.WindowManager.lod_screen_sizes
+    del bpy.types.WindowManager.lod_errors
+    del bpy.types.WindowManager.lod_deduplicate
+    del bpy.types.WindowManager.group_method
+    del bpy.types.WindowManager.group_distance
+    del bpy.types.WindowManager.group_by_class
+    del bpy.types.WindowManager.bii_trace_memory
+    del bpy.types.WindowManager.bii_profile
@@ -1,90 +1,115 @@
 import bpy
-import bmesh
+from . import fbx_export_preset
+from .instrumentation import instrumented
+from .lazy_import import lazy_import
 
-def get_evaluated_world_mesh(obj):
+ifc_psets = lazy_import(".ifc_psets", __package__)
+mesh_metrics = lazy_import(".mesh_metrics", __package__)
+
+def calculate_bulk_metrics(objs):
+    """
+    Volume and height of every mesh object in 'objs', computed once and
+    shared by the IFC and FBX paths. Returns a dict obj -> (volume, height).
+    """
     depsgraph = bpy.context.evaluated_depsgraph_get()
-    eval_obj = obj.evaluated_get(depsgraph)
-    mesh = eval_obj.to_mesh()
-    
-    # Apply world transform to mesh vertices
-    mesh.transform(obj.matrix_world)
-    
-    return mesh
-
-def calculate_volume(mesh):
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    volume = bm.calc_volume(signed=True)
-    bm.free()
-    return volume
-
-def calculate_height(mesh):
-    # Example calculation - adjust as needed
-    z_coords = [v.co.z for v in mesh.vertices]
-    height = max(z_coords) - min(z_coords)
-    return height
-
-def set_ifc_class_for_bulk(self, context, material):
+    return {obj: mesh_metrics.evaluated_metrics(obj, depsgraph) for obj in objs if obj.type == 'MESH'}
+
+def get_bulk_metrics(metrics, obj):
+    # Objects replaced while assigning the IFC class are measured on demand
+    if obj not in metrics:
+        metrics[obj] = mesh_metrics.evaluated_metrics(obj, bpy.context.evaluated_depsgraph_get())
+    return metrics[obj]
+
+BULK_PSET = "dProB_Bulk"
+
+BULK_PROP_TEMPLATES = [
+    {"name": "BulkMaterial", "description": "Limited to what dProB is able to interpret!"},
+    {"name": "BulkVolume", "primary_measure_type": "IfcVolumeMeasure"},
+    {"name": "BulkHeight", "primary_measure_type": "IfcLengthMeasure"},
+]
+
+BULK_MEASURE_TYPES = {
+    "BulkMaterial": "IfcLabel",
+    "BulkVolume": "IfcVolumeMeasure",
+    "BulkHeight": "IfcLengthMeasure",
+}
+
+def assign_ifc_class(ifc_file, obj, ifc_class, body_context):
+    """
+    Assign 'ifc_class' to 'obj' through the Bonsai core API, without
+    changing the active object or running an operator.
+    Returns the IFC element.
+    """
+    import ifcopenshell.api
+    import bonsai.core.root
+    import bonsai.tool as tool
+
+    element = tool.Ifc.get_entity(obj)
+    if element is None:
+        element = bonsai.core.root.assign_class(
+            tool.Ifc, tool.Collector, tool.Root,
+            obj=obj, ifc_class=ifc_class, should_add_representation=True, context=body_context,
+        )
+    elif not element.is_a(ifc_class):
+        element = ifcopenshell.api.run("root.reassign_class", ifc_file, product=element, ifc_class=ifc_class)
+        tool.Ifc.link(element, obj)
+    return element
+
+def set_ifc_class_for_bulk(self, context, material, metrics):
     try:
         import ifcopenshell
+        import ifcopenshell.util.representation
         import bonsai
         from bonsai.bim.ifc import IfcStore
         import bonsai.tool as tool
-        from bonsai.bim.module.pset.data import Data as PsetData
-        # Get the active IFC file
-        ifc_file = IfcStore.get_file()
-        if not ifc_file:
-            print("No IFC file found. Ensure you're working in a Bonsai project if you want to generate an IFC file.")
-            print("Be sure to activate 'Custom Properties' when exporting FBX.")
-            return    
-
-        # Create a new Pset template file and the Pset template for Bulk
-        pset_template = ifcopenshell.api.run("pset_template.add_pset_template", ifc_file, name="dProB_Bulk")
-        ifcopenshell.api.run("pset_template.add_prop_template", ifc_file, pset_template=pset_template, name="BulkMaterial", description="Limited to what dProB is able to interpret!")
-        ifcopenshell.api.run("pset_template.add_prop_template", ifc_file, pset_template=pset_template, name="BulkVolume", primary_measure_type="IfcVolumeMeasure")
-        ifcopenshell.api.run("pset_template.add_prop_template", ifc_file, pset_template=pset_template, name="BulkHeight", primary_measure_type="IfcLengthMeasure")
+    except ImportError:
+        self.report({'INFO'}, "Bonsai is not installed. Good for you.")
+        return
+
+    # Get the active IFC file
+    ifc_file = IfcStore.get_file()
+    if not ifc_file:
+        print("No IFC file found. Ensure you're working in a Bonsai project if you want to generate an IFC file.")
+        print("Be sure to activate 'Custom Properties' when exporting FBX.")
+        return
+
+    # New IFC elements get their body representation in this context
+    body_context = ifcopenshell.util.representation.get_context(ifc_file, "Model", "Body", "MODEL_VIEW")
+    if body_context is None:
+        self.report({'ERROR'}, "The IFC file has no Model/Body/MODEL_VIEW representation context. Add it in Bonsai first.")
+        return
+
+    # The Pset template for Bulk is only created once per file
+    if ifc_psets.ensure_pset_template(ifc_file, BULK_PSET, BULK_PROP_TEMPLATES):
         bonsai.bim.handler.refresh_ui_data()
         bonsai.bim.schema.reload(tool.Ifc.get().schema)
-        
-        # Loop through all selected objects
-        for obj in bpy.context.selected_objects:
-            if obj.type == 'MESH':
-
-                # Set the active object
-                bpy.context.view_layer.objects.active = obj
-                # Assign the IFC class
-                bpy.ops.bim.assign_class(ifc_class="IfcBuilding")
-                # get the ifc object
-                ifc_obj = IfcStore.get_file().by_id(obj.BIMObjectProperties.ifc_definition_id)
-                # check if the object is valid
-                if not ifc_obj:
-                    print(f"Object {obj.name} has no IFC object.")
-                    continue
-                pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=ifc_obj, name="dProB_Bulk")
-
-                mesh = get_evaluated_world_mesh(obj)
-                volume = calculate_volume(mesh)
-                height = calculate_height(mesh)
-
-                # Set the properties of the Pset
-                new_values = {
-                    "BulkMaterial": material,            
-                    "BulkVolume": volume, 
-                    "BulkHeight": height
-                }
-                ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties=new_values)
-
-                print(f"Assigned IfcBuilding and custom Pset to {obj.name}.")
-    except:
-        self.report({'INFO'}, "Bonsai is not installed. Good for you.")
 
-def set_fbx_class_for_bulk(self, context, material):
+    rows = []
+    for obj in bpy.context.selected_objects:
+        if obj.type == 'MESH':
+            ifc_obj = assign_ifc_class(ifc_file, obj, "IfcBuilding", body_context)
+            # check if the object is valid
+            if not ifc_obj:
+                print(f"Object {obj.name} has no IFC object.")
+                continue
+
+            volume, height = get_bulk_metrics(metrics, obj)
+            rows.append((ifc_obj, {
+                "BulkMaterial": material,
+                "BulkVolume": volume,
+                "BulkHeight": height
+            }))
+
+    pset_count = ifc_psets.write_shared_psets(ifc_file, BULK_PSET, rows, BULK_MEASURE_TYPES)
+    bonsai.bim.handler.refresh_ui_data()
+    print(f"Assigned IfcBuilding and custom Pset to {len(rows)} objects ({pset_count} property sets).")
+
+def set_fbx_class_for_bulk(self, context, material, metrics):
+    fbx_export_preset.install_preset()
     fbxs = 0
     for obj in bpy.context.selected_objects:
         if obj.type == 'MESH':
-            mesh = get_evaluated_world_mesh(obj)
-            volume = calculate_volume(mesh)
-            height = calculate_height(mesh)
+            volume, height = get_bulk_metrics(metrics, obj)
             obj["BulkMaterial"] = material
             obj["BulkVolume"] = volume
             obj["BulkHeight"] = height
@@ -97,10 +122,16 @@ class SetIfcClassForBulkOperator(bpy.types.Operator):
     bl_idname = "object.set_ifc_class_for_bulk_operator"
     bl_label = "Set IFC / FBX Class for Bulk"
 
+    @instrumented
     def execute(self, context):
         material = context.scene.bulk_material        
-        set_ifc_class_for_bulk(self, context, material)
-        set_fbx_class_for_bulk(self, context, material)
+        with self._run.stage("metrics"):
+            metrics = calculate_bulk_metrics(context.selected_objects)
+        with self._run.stage("ifc"):
+            set_ifc_class_for_bulk(self, context, material, metrics)
+        with self._run.stage("fbx"):
+            set_fbx_class_for_bulk(self, context, material, metrics)
+        self._run.count(objects=len(metrics))
         return {'FINISHED'}
 
 
@@ -1,4 +1,25 @@
 import bpy
+import bmesh
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from mathutils import Matrix, Vector
+from .instrumentation import OperatorRun, begin_run, instrumented
+from .lazy_import import lazy_import
+
+mesh_metrics = lazy_import(".mesh_metrics", __package__)
+
+# Seconds of work per timer event of the modal operator
+SLICE_SECONDS = 0.1
+TIMER_INTERVAL = 0.01
+
+# Events still handled by Blender while the modal operator runs
+NAVIGATION_EVENTS = {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEMOVE'}
 
 class CleanReduceIfcOperator(bpy.types.Operator):
     """Clean and reduce Model"""
@@ -6,84 +27,550 @@ class CleanReduceIfcOperator(bpy.types.Operator):
     bl_label = "Clean and Reduce Model"
     bl_options = {'REGISTER', 'UNDO'}
 
+    _timer = None
+    _job = None
+    _run = None
+
+    @instrumented
     def execute(self, context):
-        clean_reduce_ifc(self, context)
-        self.report({'INFO'}, "Model Clean and Reduce Completed")
+        # Blocking run, e.g. from scripts
+        stats = clean_reduce_ifc(self, context)
+        self.report_stats(stats)
         return {'FINISHED'}
 
-def clean_and_link_mesh_data(context):
-    # Check if there are selected objects
-    if not context.selected_objects:
-        print("No objects selected. Exiting function.")
-        return  # Exit the function if no objects are selected
+    def invoke(self, context, event):
+        self._run = begin_run(context, self.bl_label)
+        self._job = CleanReduceJob(context, self._run)
+        if not self._job.total:
+            self._run.finish('CANCELLED')
+            self.report({'INFO'}, "No mesh objects selected.")
+            return {'CANCELLED'}
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._job.cancel(context)
+            self.finish(context, 'CANCELLED')
+            self.report({'WARNING'}, f"Clean and Reduce cancelled, kept {self._job.processed} finished meshes.")
+            # Finished meshes stay changed, so this still needs an undo step
+            return {'FINISHED'}
+
+        if event.type == 'TIMER':
+            done = self._job.step(context, SLICE_SECONDS)
+            for area in context.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+            if done:
+                self.finish(context)
+                self.report_stats(self._job.stats)
+                return {'FINISHED'}
+
+        if event.type in NAVIGATION_EVENTS:
+            return {'PASS_THROUGH'}
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context, status='FINISHED'):
+        context.window_manager.event_timer_remove(self._timer)
+        self._job.finish(context)
+        self._run.finish(status)
+
+    def report_stats(self, stats):
+        if not stats:
+            self.report({'INFO'}, "Model Clean and Reduce Completed")
+            return
+        message = (f"Model Clean and Reduce Completed. Triangles: {stats['triangles_before']:,} -> {stats['triangles_after']:,}.")
+        if stats["merged_meshes"]:
+            message += (f" Merged {stats['merged_meshes']} of {stats['unique_meshes']} meshes "
+                        f"into identical ones, {stats['reclaimed_bytes'] / 1024 / 1024:.1f} MB reclaimed.")
+        self.report({'INFO'}, message)
+
+# Same defaults as the mesh.remove_doubles and mesh.dissolve_limited operators
+MERGE_DISTANCE = 0.0001
+DISSOLVE_ANGLE_LIMIT = 0.0872665
+
+# Unique meshes decimated per depsgraph evaluation
+DECIMATE_CHUNK_SIZE = 256
+
+# In the adaptive modes only meshes up to this many faces are dissolved,
+# on large meshes the decimation alone controls the triangle count
+DISSOLVE_MAX_FACES = 1000
+
+def clean_mesh(mesh, dissolve=True):
+    """
+    Remove doubles and dissolve flat faces/edges of 'mesh' directly on the
+    datablock, without entering edit mode.
+    """
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=MERGE_DISTANCE)
+    if dissolve:
+        bmesh.ops.dissolve_limited(bm, angle_limit=DISSOLVE_ANGLE_LIMIT, verts=bm.verts, edges=bm.edges, delimit={'NORMAL'})
+    bm.to_mesh(mesh)
+    bm.free()
 
-    # Check if there's an active object; if not, set the first selected object as active
-    if not context.active_object or context.active_object not in context.selected_objects:
-        context.view_layer.objects.active = context.selected_objects[0]
+def decimate_meshes(context, meshes, ratios):
+    """
+    Decimate 'meshes' in place. Every mesh gets a temporary helper object
+    with only a Decimate modifier, all helpers are evaluated with a single
+    depsgraph update and the result is written back into the mesh.
+    The helpers live in a temporary collection and are removed again,
+    so the selection and the user's objects are left untouched.
+    'ratios' holds one decimate ratio per mesh, meshes at 1.0 are skipped.
+    """
+    meshes = [mesh for mesh, ratio in zip(meshes, ratios) if ratio < 1.0]
+    ratios = [ratio for ratio in ratios if ratio < 1.0]
+    if not meshes:
+        return
 
-    # A dictionary to track original mesh data and their objects
+    collection = bpy.data.collections.new("BII_Decimate_Temp")
+    context.scene.collection.children.link(collection)
+    helpers = []
+    try:
+        for mesh, ratio in zip(meshes, ratios):
+            helper = bpy.data.objects.new(mesh.name, mesh)
+            collection.objects.link(helper)
+            mod = helper.modifiers.new(name="DecimateMod", type='DECIMATE')
+            mod.ratio = ratio
+            helpers.append(helper)
+
+        depsgraph = context.evaluated_depsgraph_get()
+        depsgraph.update()
+        for helper in helpers:
+            bm = bmesh.new()
+            bm.from_object(helper, depsgraph)
+            bm.to_mesh(helper.data)
+            bm.free()
+    finally:
+        for helper in helpers:
+            bpy.data.objects.remove(helper, do_unlink=True)
+        bpy.data.collections.remove(collection)
+
+def clean_and_decimate(context, meshes, ratio, targets=None, dissolve_max_faces=None):
+    """
+    Clean and decimate 'meshes' in place. Without 'targets' every mesh is
+    decimated by 'ratio', otherwise each mesh gets the ratio that brings
+    its cleaned triangle count down to its target. With
+    'dissolve_max_faces' only meshes up to that face count are dissolved.
+    """
+    for mesh in meshes:
+        clean_mesh(mesh, dissolve=dissolve_max_faces is None or len(mesh.polygons) <= dissolve_max_faces)
+
+    if targets is None:
+        ratios = [ratio] * len(meshes)
+    else:
+        ratios = [min(1.0, target / max(1, mesh_metrics.triangle_count(mesh))) for mesh, target in zip(meshes, targets)]
+    for start in range(0, len(meshes), DECIMATE_CHUNK_SIZE):
+        decimate_meshes(context, meshes[start:start + DECIMATE_CHUNK_SIZE], ratios[start:start + DECIMATE_CHUNK_SIZE])
+
+def reduce_meshes(context, items, ratio, targets=None, dissolve_max_faces=None):
+    """
+    Clean and decimate a unique copy of every mesh in 'items' (a list of
+    (mesh, objects)) and link it to the objects that shared the original.
+    See clean_and_decimate for 'targets' and 'dissolve_max_faces'.
+    """
+    cleaned = [mesh_data.copy() for mesh_data, objects in items]
+    clean_and_decimate(context, cleaned, ratio, targets, dissolve_max_faces)
+
+    for new_data, (mesh_data, objects) in zip(cleaned, items):
+        for obj in objects:
+            obj.data = new_data
+
+def collect_mesh_users(objects):
+    """
+    Map every mesh datablock used by the mesh objects in 'objects' to the
+    list of those objects, so shared meshes are processed only once.
+    """
     mesh_to_objects = {}
-    for obj in bpy.context.selected_objects:
+    for obj in objects:
         if obj.type == 'MESH':
-            if obj.data not in mesh_to_objects:
-                mesh_to_objects[obj.data] = [obj]
-            else:
-                mesh_to_objects[obj.data].append(obj)
+            mesh_to_objects.setdefault(obj.data, []).append(obj)
+    return mesh_to_objects
+
+def mesh_geometry_key(mesh_data, tolerance=MERGE_DISTANCE):
+    # Read on the main thread, the returned callable does the pure NumPy part
+    arrays = mesh_metrics.read_mesh_topology(mesh_data)
+    attributes = mesh_metrics.read_mesh_attributes(mesh_data)
+    materials = tuple(mat.name if mat else "" for mat in mesh_data.materials)
 
-    total_objects = len(context.selected_objects)
-    processed_objects = 0
+    def compute():
+        # Meshes with shape keys or custom normals are never merged
+        if attributes is None:
+            return None, None
+        key, origin = mesh_metrics.geometry_key(*arrays, tolerance=tolerance, attributes=attributes)
+        return (key, materials), origin
 
-    # Ensure we're in object mode to start
-    bpy.ops.object.mode_set(mode='OBJECT')
+    return compute
 
-    # Process each unique mesh data block
+def can_move(obj):
+    # Moving these would drag their children along, or be overridden by
+    # constraints and animation
+    return not obj.children and not obj.constraints and obj.animation_data is None
+
+def link_duplicates(mesh_to_objects, keys, tolerance=MERGE_DISTANCE):
+    """
+    Relink objects whose meshes have the same geometry key to one
+    canonical mesh, so every shape is cleaned and reduced only once.
+    Objects are moved by the translation difference so they stay where
+    they were, objects with children, constraints or animation data keep
+    their mesh instead. Meshes without a key and meshes used by objects
+    with vertex groups are never merged. Duplicates left without users
+    are removed.
+    Returns (mesh_to_objects, merged mesh count, reclaimed bytes).
+    """
+    canonical = {}
+    result = {}
+    merged = 0
+    reclaimed = 0
     for mesh_data, objects in mesh_to_objects.items():
-        original_object = objects[0]  # Select the first object for modification
-
-        # Ensure the object has a unique mesh data block
-        original_object.data = original_object.data.copy()
-
-        # Make the original object active
-        bpy.context.view_layer.objects.active = original_object
-
-        # Ensure all objects are deselected before selecting the active object
-        bpy.ops.object.select_all(action='DESELECT')
-        original_object.select_set(True)
-
-        # Enter Edit mode and select all vertices
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-
-        # Apply the necessary mesh operations
-        bpy.ops.mesh.remove_doubles()
-        bpy.ops.mesh.dissolve_limited(angle_limit=0.0872665)  # Example angle limit
-
-        # Go back to Object mode
-        bpy.ops.object.mode_set(mode='OBJECT')
-        
-        # Add and apply the Decimate modifier
-        mod = original_object.modifiers.new(name="DecimateMod", type='DECIMATE')
-        mod.ratio = context.window_manager.decimate_ratio
-        bpy.ops.object.modifier_apply(modifier=mod.name)
-
-        # Link the modified mesh data to the other objects
-        for other_object in objects[1:]:  # Skip the first object since it's already modified
-            other_object.data = original_object.data
-
-        processed_objects += 1    
-        
-        # Update progress message every 10 objects
-        if processed_objects % 15 == 0 or processed_objects == total_objects:
-            progress_message = f"Processing {processed_objects} of {total_objects} objects..."
-            context.scene.clean_progress = progress_message    
-            bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-    
-    # Clear the status text when done
-    context.scene.clean_progress = "Ready to clean and reduce IFC"
-    bpy.context.workspace.status_text_set(None)
+        key, origin = keys[mesh_data]
+        # The vertex weights in the mesh belong to the object's vertex groups
+        if key is not None and any(obj.vertex_groups for obj in objects):
+            key = None
+        if key is None or key not in canonical:
+            if key is not None:
+                canonical[key] = (mesh_data, origin)
+            result[mesh_data] = list(objects)
+            continue
+
+        target, target_origin = canonical[key]
+        offset = Vector(origin - target_origin)
+        moved = offset.length > tolerance
+        kept = [obj for obj in objects if moved and not can_move(obj)]
+        for obj in objects:
+            if obj in kept:
+                continue
+            if moved:
+                obj.matrix_world = obj.matrix_world @ Matrix.Translation(offset)
+            obj.data = target
+            result[target].append(obj)
+        if kept:
+            result[mesh_data] = kept
+            continue
+        merged += 1
+
+        if mesh_data.users == 0:
+            reclaimed += mesh_metrics.mesh_bytes(mesh_data)
+            bpy.data.meshes.remove(mesh_data)
+
+    return result, merged, reclaimed
+
+def deduplicate_meshes(mesh_to_objects, tolerance=MERGE_DISTANCE):
+    """
+    Relink objects whose meshes are geometrically identical (up to a
+    translation and 'tolerance') to one canonical mesh, see
+    link_duplicates.
+    Returns (mesh_to_objects, merged mesh count, reclaimed bytes).
+    """
+    keys = {mesh_data: mesh_geometry_key(mesh_data, tolerance)() for mesh_data in mesh_to_objects}
+    return link_duplicates(mesh_to_objects, keys, tolerance)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clean_reduce_worker.py")
+
+def split_into_shards(items, shard_count):
+    """
+    Distribute (mesh, objects) items over 'shard_count' shards of about
+    equal face count, largest meshes first.
+    """
+    shards = [[] for _ in range(shard_count)]
+    loads = [0] * shard_count
+    for item in sorted(items, key=lambda item: len(item[0].polygons), reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(item)
+        loads[lightest] += len(item[0].polygons) + 1
+    return [shard for shard in shards if shard]
+
+def start_shard_worker(directory, index, shard, ratio, targets=None, dissolve_max_faces=None):
+    """
+    Write the meshes of 'shard' to a library .blend and start a headless
+    Blender process reducing them, see clean_reduce_worker.py.
+    'targets' maps meshes to target triangle counts, see clean_and_decimate.
+    Returns (process, output path).
+    """
+    source = os.path.join(directory, f"shard_{index}.blend")
+    output = os.path.join(directory, f"shard_{index}_reduced.blend")
+    settings = os.path.join(directory, f"shard_{index}.json")
+    bpy.data.libraries.write(source, {mesh for mesh, _ in shard}, fake_user=True)
+    with open(settings, "w") as f:
+        json.dump({
+            "ratio": ratio,
+            "targets": None if targets is None else {mesh.name: int(targets[mesh]) for mesh, _ in shard},
+            "dissolve_max_faces": dissolve_max_faces,
+        }, f)
+
+    command = [bpy.app.binary_path, "--background", "--factory-startup", "--python-exit-code", "1",
+               "--python", WORKER_SCRIPT, "--", source, output, settings]
+    with open(output + ".log", "w") as log:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+    return process, output
+
+def reduce_shard(source, output, ratio, targets=None, dissolve_max_faces=None):
+    """
+    Worker side of the sharded mode: append all meshes of the library
+    'source' into an empty session, clean and decimate them in place and
+    write them to 'output' under their original names. 'targets' maps mesh
+    names to target triangle counts.
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    with bpy.data.libraries.load(source) as (data_from, data_to):
+        data_to.meshes = data_from.meshes
+
+    meshes = list(data_to.meshes)
+    if targets is not None:
+        targets = [targets[mesh.name] for mesh in meshes]
+    clean_and_decimate(bpy.context, meshes, ratio, targets, dissolve_max_faces)
+
+    # Keep the material slots but not the materials, the session that
+    # appends the result still has them
+    for mesh in meshes:
+        for i in range(len(mesh.materials)):
+            mesh.materials[i] = None
+
+    bpy.data.libraries.write(output, set(meshes), fake_user=True)
+
+def link_shard_result(shard, output):
+    """
+    Append the reduced meshes of a finished shard and link them to the
+    objects that shared the original meshes.
+    """
+    names = [mesh.name for mesh, _ in shard]
+    with bpy.data.libraries.load(output) as (data_from, data_to):
+        data_to.meshes = names
+
+    for reduced, (mesh_data, objects) in zip(data_to.meshes, shard):
+        if reduced is None:
+            raise RuntimeError(f"Mesh {mesh_data.name} missing in {output}")
+        reduced.use_fake_user = False
+        for i, mat in enumerate(mesh_data.materials):
+            reduced.materials[i] = mat
+        for obj in objects:
+            obj.data = reduced
+
+class CleanReduceJob:
+    """
+    Clean and reduce of the selected meshes, split into time-boxed steps
+    so it can run from a modal operator. Geometry hashing runs on a worker
+    thread, everything touching Blender data runs in step() on the main
+    thread. Every finished step leaves the scene consistent, so the job
+    can be cancelled between steps. The time spent per stage is recorded
+    in 'run'.
+    """
+
+    def __init__(self, context, run=None):
+        self.run = run or OperatorRun(CleanReduceIfcOperator.bl_label)
+        # A dictionary to track original mesh data and their objects
+        self.mesh_to_objects = collect_mesh_users(context.selected_objects)
+        self.run.count(objects=sum(len(objects) for objects in self.mesh_to_objects.values()))
+
+        wm = context.window_manager
+        self.ratio = wm.decimate_ratio
+        self.mode = wm.reduce_mode
+        self.triangle_budget = wm.triangle_budget
+        self.max_error = wm.max_error
+        self.dissolve_max_faces = None if self.mode == 'RATIO' else DISSOLVE_MAX_FACES
+        self.targets = None
+        self.triangles_before = {}
+        self.stats = {"unique_meshes": len(self.mesh_to_objects), "merged_meshes": 0, "reclaimed_bytes": 0,
+                      "triangles_before": 0, "triangles_after": 0}
+        self.items = list(self.mesh_to_objects.items())
+        self.total = len(self.items)
+        self.index = 0
+        self.processed = 0
+        self.chunk_size = 1
+        self.futures = []
+        self.executor = None
+        self.shard_count = context.window_manager.clean_shards
+        self.shards = []
+        self.processes = []
+        self.shard_dir = None
+        self.stage = 'REDUCE'
+        if self.shard_count > 1 and self.total > 1:
+            self.stage = 'SHARD'
+        if context.window_manager.deduplicate_meshes and self.total:
+            self.stage = 'HASH'
+            self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.has_progress = bool(self.total)
+        if not self.total:
+            return
+
+        # Edit mode would hold its own copy of the mesh, so leave it once
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        if self.stage != 'HASH':
+            with self.run.stage("plan"):
+                self.plan()
+        self.start_time = time.perf_counter()
+        context.window_manager.progress_begin(0, self.total)
+
+    def step(self, context, budget):
+        """
+        Work for about 'budget' seconds. Returns True when finished.
+        """
+        deadline = time.perf_counter() + budget
+        started = time.perf_counter()
+
+        if self.stage == 'HASH':
+            while self.index < self.total and time.perf_counter() < deadline:
+                self.futures.append(self.executor.submit(mesh_geometry_key(self.items[self.index][0])))
+                self.index += 1
+                context.scene.clean_progress = f"Hashing {self.index} of {self.total} meshes..."
+            if self.index < self.total:
+                self.run.add_time("hash", time.perf_counter() - started)
+                return False
+
+            done, pending = wait(self.futures, timeout=None if math.isinf(budget) else 0)
+            if pending:
+                self.run.add_time("hash", time.perf_counter() - started)
+                return False
+
+            keys = {mesh_data: future.result() for (mesh_data, _), future in zip(self.items, self.futures)}
+            self.mesh_to_objects, self.stats["merged_meshes"], self.stats["reclaimed_bytes"] = link_duplicates(self.mesh_to_objects, keys)
+            self.items = list(self.mesh_to_objects.items())
+            self.total = len(self.items)
+            self.index = 0
+            self.futures = []
+            self.run.add_time("hash", time.perf_counter() - started)
+            self.executor.shutdown()
+            self.executor = None
+            self.stage = 'SHARD' if self.shard_count > 1 and self.total > 1 else 'REDUCE'
+            with self.run.stage("plan"):
+                self.plan()
+            self.start_time = time.perf_counter()
+            context.window_manager.progress_begin(0, self.total)
+
+        if self.stage == 'SHARD':
+            started = time.perf_counter()
+            if not self.processes:
+                self.shard_dir = tempfile.mkdtemp(prefix="bii_clean_reduce_")
+                self.shards = split_into_shards(self.items, self.shard_count)
+                self.processes = [start_shard_worker(self.shard_dir, i, shard, self.ratio, self.targets, self.dissolve_max_faces)
+                                  for i, shard in enumerate(self.shards)]
+
+            if math.isinf(budget):
+                for process, _ in self.processes:
+                    process.wait()
+            running = sum(process.poll() is None for process, _ in self.processes)
+            context.scene.clean_progress = f"{len(self.processes) - running} of {len(self.processes)} shards reduced, {running} running (Esc to cancel)"
+            if running:
+                self.run.add_time("shards", time.perf_counter() - started)
+                return False
+
+            # Link the results back, shards whose worker failed are reduced here
+            failed = []
+            for shard, (process, output) in zip(self.shards, self.processes):
+                try:
+                    if process.returncode != 0:
+                        with open(output + ".log") as log:
+                            raise RuntimeError(log.read()[-2000:])
+                    link_shard_result(shard, output)
+                    self.record(shard)
+                    self.processed += len(shard)
+                except (RuntimeError, OSError) as e:
+                    print(f"Shard worker failed, reducing its meshes in this session: {e}")
+                    failed.extend(shard)
+            self.remove_shard_files()
+            self.run.add_time("shards", time.perf_counter() - started)
+
+            self.items = failed
+            self.total = len(failed)
+            self.index = 0
+            self.stage = 'REDUCE'
+
+        while self.index < self.total and time.perf_counter() < deadline:
+            chunk = self.items[self.index:self.index + self.chunk_size]
+            started = time.perf_counter()
+            targets = None if self.targets is None else [self.targets[mesh_data] for mesh_data, _ in chunk]
+            reduce_meshes(context, chunk, self.ratio, targets, self.dissolve_max_faces)
+            self.record(chunk)
+            per_mesh = (time.perf_counter() - started) / len(chunk)
+            self.run.add_time("reduce", per_mesh * len(chunk))
+
+            self.index += len(chunk)
+            self.processed += len(chunk)
+            # Aim for chunks of about half a time slice
+            self.chunk_size = int(min(DECIMATE_CHUNK_SIZE, max(1, budget * 0.5 / max(per_mesh, 1e-6))))
+            context.window_manager.progress_update(self.index)
+            context.scene.clean_progress = self.progress_text()
+
+        return self.index >= self.total
+
+    def plan(self):
+        """
+        Count the triangles of every unique mesh and, in the adaptive
+        modes, give each mesh its target triangle count. The budget counts
+        every object using a mesh.
+        """
+        meshes = [mesh_data for mesh_data, _ in self.items]
+        instances = [len(objects) for _, objects in self.items]
+        triangles = [mesh_metrics.triangle_count(mesh_data) for mesh_data in meshes]
+        self.triangles_before = dict(zip(meshes, triangles))
+        self.stats["triangles_before"] = sum(count * users for count, users in zip(triangles, instances))
+        if self.mode == 'RATIO':
+            return
+
+        diagonals = [mesh_metrics.bounding_box_diagonal(mesh_data) for mesh_data in meshes]
+        if self.mode == 'BUDGET':
+            targets = mesh_metrics.allocate_triangles(triangles, diagonals, instances, budget=self.triangle_budget)
+        else:
+            targets = mesh_metrics.allocate_triangles(triangles, diagonals, max_error=self.max_error)
+        self.targets = dict(zip(meshes, targets.tolist()))
+
+    def record(self, items):
+        # Before and after triangle counts of freshly reduced meshes
+        for mesh_data, objects in items:
+            after = mesh_metrics.triangle_count(objects[0].data)
+            self.stats["triangles_after"] += after * len(objects)
+            print(f"{objects[0].data.name}: {self.triangles_before[mesh_data]} -> {after} triangles, {len(objects)} object(s)")
+
+    def progress_text(self):
+        elapsed = time.perf_counter() - self.start_time
+        rate = self.index / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.index) / rate if rate > 0 else 0.0
+        return f"{self.index} of {self.total} meshes, {rate:.1f} meshes/s, ETA {int(eta) // 60}:{int(eta) % 60:02d} (Esc to cancel)"
+
+    def cancel(self, context):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for process, _ in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        self.remove_shard_files()
+
+    def remove_shard_files(self):
+        for process, _ in self.processes:
+            process.wait()
+        self.processes = []
+        if self.shard_dir is not None:
+            shutil.rmtree(self.shard_dir, ignore_errors=True)
+            self.shard_dir = None
+
+    def finish(self, context):
+        self.run.count(meshes=self.stats["unique_meshes"], triangles_before=self.stats["triangles_before"], triangles_after=self.stats["triangles_after"])
+        if self.has_progress:
+            context.window_manager.progress_end()
+        # Clear the status text when done
+        context.scene.clean_progress = "Ready to clean and reduce IFC"
+
+def clean_and_link_mesh_data(context, run=None):
+    # Check if there are selected objects
+    if not context.selected_objects:
+        print("No objects selected. Exiting function.")
+        return None  # Exit the function if no objects are selected
+
+    job = CleanReduceJob(context, run)
+    while not job.step(context, math.inf):
+        pass
+    job.finish(context)
+    return job.stats
 
 def clean_reduce_ifc(self, context):
-    clean_and_link_mesh_data(context)
+    return clean_and_link_mesh_data(context, getattr(self, "_run", None))
 
 def register():
     bpy.utils.register_class(CleanReduceIfcOperator)
@@ -0,0 +1,27 @@
+"""
+Headless worker of the sharded Clean and Reduce mode, started by
+clean_reduce_ifc.start_shard_worker:
+
+    blender --background --factory-startup --python clean_reduce_worker.py -- \
+        shard.blend shard_reduced.blend shard.json
+
+shard.json holds the decimate ratio, the target triangle count per mesh
+name (or null) and the face limit for dissolving (or null).
+"""
+import importlib
+import json
+import os
+import sys
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    source, output, settings = sys.argv[sys.argv.index("--") + 1:][:3]
+    with open(settings) as f:
+        settings = json.load(f)
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    clean_reduce_ifc = importlib.import_module(os.path.basename(ADDON_DIR) + ".clean_reduce_ifc")
+    clean_reduce_ifc.reduce_shard(source, output, settings["ratio"], settings["targets"], settings["dissolve_max_faces"])
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,69 @@
 import bpy
+import bmesh
+from .instrumentation import OperatorRun, instrumented
+from .lazy_import import lazy_import
+
+mesh_metrics = lazy_import(".mesh_metrics", __package__)
+
+def fill_mesh_holes(mesh, edges):
+    """
+    Fill the holes bounded by the edges with indices 'edges' directly on
+    the datablock. Every hole becomes one face.
+    Returns the number of holes filled.
+    """
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.edges.ensure_lookup_table()
+    # sides=0 fills holes of any size
+    result = bmesh.ops.holes_fill(bm, edges=[bm.edges[i] for i in edges], sides=0)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+    return len(result["faces"])
+
+def close_mesh_holes(self, context, run=None):
+    """
+    Fill the holes of every unique mesh of the selected objects once.
+    Meshes without boundary edges are skipped without touching them.
+    Returns a dict object -> number of holes filled.
+    """
+    run = run or OperatorRun(CloseMeshHolesOperator.bl_label)
+    # Edit mode would hold its own copy of the mesh, so leave it once
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    holes_per_mesh = {}
+    filled = {}
+    for obj in context.selected_objects:
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.data
+        if mesh not in holes_per_mesh:
+            with run.stage("detect"):
+                edges = mesh_metrics.boundary_edges(mesh)
+            with run.stage("fill"):
+                holes_per_mesh[mesh] = fill_mesh_holes(mesh, edges) if len(edges) else 0
+        filled[obj] = holes_per_mesh[mesh]
+        if filled[obj]:
+            print(f"Filled {filled[obj]} holes in {obj.name}.")
+    run.count(objects=len(filled), meshes=len(holes_per_mesh), holes=sum(holes_per_mesh.values()))
+    return filled
 
-def close_mesh_holes(self, context):
-    # Loop through all selected objects
-    for obj in bpy.context.selected_objects:
-        # Check if the object is a mesh
-        if obj.type == 'MESH':
-            # Switch to Object Mode (required to perform some operations)
-            bpy.ops.object.mode_set(mode='OBJECT')
-            # Make the current object the active object
-            bpy.context.view_layer.objects.active = obj
-            # Switch to Edit Mode
-            bpy.ops.object.mode_set(mode='EDIT')
-            # Select all vertices
-            bpy.ops.mesh.select_all(action='SELECT')
-            # Fill holes
-            # Here, sides=0 means it will fill holes of any size. Adjust as needed.
-            bpy.ops.mesh.fill_holes(sides=0)
-            # Switch back to Object Mode
-            bpy.ops.object.mode_set(mode='OBJECT')
-
-    # Deselect all to clean up selection after operation
-            
 class CloseMeshHolesOperator(bpy.types.Operator):
-    """Print Hello World"""
+    """Close the holes of the selected meshes"""
     bl_idname = "object.close_mesh_holes_operator"
     bl_label = "Close Selected Mesh Holes"
+    bl_options = {'REGISTER', 'UNDO'}
 
+    @instrumented
     def execute(self, context):
-        close_mesh_holes(self, context)
+        filled = close_mesh_holes(self, context, self._run)
+        objects = sum(1 for holes in filled.values() if holes)
+        self.report({'INFO'}, f"Filled {sum(filled.values())} holes in {objects} of {len(filled)} objects.")
         return {'FINISHED'}
 
 def register():
     bpy.utils.register_class(CloseMeshHolesOperator)
 
 def unregister():
-    bpy.utils.unregister_class(CloseMeshHolesOperator)
\ No newline at end of file
+    bpy.utils.unregister_class(CloseMeshHolesOperator)
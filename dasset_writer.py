@@ -0,0 +1,138 @@
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+import numpy as np
+
+ASSET_METADATA = '{"Format":"Rails","ProductVersion":"Simulation 2024.2.9"}'
+
+def _dumps_kwargs(compact):
+    return {"separators": (",", ":")} if compact else {"indent": 4}
+
+def handle_template(compact, precision=None):
+    """
+    printf template of one SplineHandles entry, laid out like json.dumps
+    at the depth the handles have in an indented model.json. Full
+    precision uses %r, which prints floats exactly like json.dumps.
+    """
+    number = "%r" if precision is None else f"%.{precision}f"
+    if compact:
+        return '{"X":' + number + ',"Y":' + number + ',"Z":' + number + '}'
+    pad = " " * 8
+    return (pad + "{\n" + pad + '    "X": ' + number + ",\n" + pad + '    "Y": ' + number + ",\n"
+            + pad + '    "Z": ' + number + "\n" + pad + "}")
+
+def encode_handles(handles, compact=False, precision=None):
+    """
+    Format an (N, 3) handle array as the JSON list of SplineHandles in one
+    printf call, without building a dict per handle. 'precision' is the
+    number of decimals (3 for millimetres), None keeps full precision.
+    """
+    if not len(handles):
+        return "[]"
+    template = handle_template(compact, precision)
+    separator = "," if compact else ",\n"
+    body = separator.join([template] * len(handles)) % tuple(np.asarray(handles, dtype=np.float64).ravel().tolist())
+    return "[" + body + "]" if compact else "[\n" + body + "\n    ]"
+
+def iter_model_json(name, geolocation, rails, compact=False, precision=None):
+    """
+    Yield model.json in chunks, one chunk per rail.
+
+    The indented output is identical to json.dumps(model, indent=4) of the
+    whole model, but only one rail is ever turned into a string at a time.
+    SplineHandles given as (N, 3) arrays are formatted in bulk by
+    encode_handles with 'precision' decimals; at full precision the
+    output is the same as for lists of {"X", "Y", "Z"} dicts.
+
+    :param name: asset name
+    :param geolocation: dict with East, Elevation and North
+    :param rails: iterable of rail dicts (Name, SplineHandles, SplineType)
+    :param compact: write without indentation and whitespace
+    :param precision: decimals of array handles, None for full precision
+    """
+    kwargs = _dumps_kwargs(compact)
+    head = json.dumps({"Name": name, "GeoLocation": geolocation, "Rails": []}, **kwargs)
+    # "Rails" is the last key, so the last "[]" is its (empty) list
+    prefix, suffix = head.rsplit("[]", 1)
+    item_pad = "" if compact else "\n" + " " * 8
+
+    yield prefix + "["
+    count = 0
+    for rail in rails:
+        handles = rail["SplineHandles"]
+        if isinstance(handles, np.ndarray):
+            # Dump with an empty list and put the encoded handles in its place
+            text = json.dumps(dict(rail, SplineHandles=[]), **kwargs)
+            head, tail = text.split('"SplineHandles":' + ("" if compact else " ") + "[]", 1)
+            text = head + '"SplineHandles":' + ("" if compact else " ") + encode_handles(handles, compact, precision) + tail
+        else:
+            text = json.dumps(rail, **kwargs)
+        text = text.replace("\n", item_pad)
+        yield ("," if count else "") + item_pad + text
+        count += 1
+    if count and not compact:
+        yield "\n" + " " * 4
+    yield "]" + suffix
+
+def rail_dicts(named_rails, offset=(0.0, 0.0, 0.0)):
+    """
+    Yield the rail dicts of model.json, SplineHandles as (N, 3) arrays in
+    dProB axes for iter_model_json to encode.
+
+    :param named_rails: iterable of (object name, list of (N, 3) handle arrays)
+    :param offset: subtracted from every handle (geolocation)
+    """
+    for name, rails in named_rails:
+        for sampled_pts in rails:
+            # dProB is Y-up: swap Y and Z
+            yield {
+                "Name": name,
+                "SplineHandles": (sampled_pts - offset)[:, (0, 2, 1)],
+                "SplineType": "Centripetal"
+            }
+
+def write_dasset(filepath, name, geolocation, rails, compact=False, precision=None):
+    """
+    Write a .dasset archive to 'filepath', streaming model.json rail by
+    rail straight into the deflated zip entry. The archive is written to
+    '<filepath>.tmp' and only renamed to 'filepath' once it is complete.
+    See iter_model_json for 'compact' and 'precision'.
+
+    :return: dict with the number of rails, the seconds spent encoding
+             model.json and the archive size in bytes
+    """
+    count = 0
+
+    def counted(rails):
+        nonlocal count
+        for rail in rails:
+            count += 1
+            yield rail
+
+    # A failed export must not leave a truncated archive at 'filepath'
+    temp_path = filepath + ".tmp"
+    try:
+        with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            with zip_file.open("model.json", "w") as entry:
+                with io.TextIOWrapper(entry, encoding="utf-8", newline="") as text:
+                    chunks = iter_model_json(name, geolocation, counted(rails), compact, precision)
+                    encode_seconds = 0.0
+                    while True:
+                        start = time.perf_counter()
+                        chunk = next(chunks, None)
+                        encode_seconds += time.perf_counter() - start
+                        if chunk is None:
+                            break
+                        text.write(chunk)
+            zip_file.writestr("dProB_asset_metadata.json", ASSET_METADATA)
+            zip_file.writestr("asset_guid.txt", str(uuid.uuid4()))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, filepath)
+
+    return {"rails": count, "encode_seconds": encode_seconds, "bytes": os.path.getsize(filepath)}
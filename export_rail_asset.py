@@ -1,15 +1,17 @@
-import uuid
 import bpy
-import json
-import zipfile
-import io
 import os
 import math
-import bmesh
 from mathutils import Vector
-from math import degrees
 from bpy_extras.io_utils import ExportHelper
 from collections import defaultdict, deque
+from contextlib import contextmanager
+from .instrumentation import OperatorRun, instrumented
+from .lazy_import import lazy_import
+
+np = lazy_import("numpy")
+dasset_writer = lazy_import(".dasset_writer", __package__)
+rail_cache = lazy_import(".rail_cache", __package__)
+rail_geometry = lazy_import(".rail_geometry", __package__)
 
 def menu_func_export(self, context):
     self.layout.operator(ExportDProBRailAssetOperator.bl_idname, text="dProB Rail Asset (.dasset)")
@@ -22,143 +24,170 @@ def unregister():
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     bpy.utils.unregister_class(ExportDProBRailAssetOperator)
 
+# Curve settings that add a profile to the curve; zeroed while reading rails
+CURVE_PROFILE_SETTINGS = {
+    "bevel_depth": 0.0,
+    "bevel_resolution": 0,
+    "extrude": 0.0,
+    "taper_object": None,
+    "bevel_object": None,
+    "offset": 0.0,
+}
+
+@contextmanager
+def curve_profiles_disabled(objs, depsgraph):
+    """
+    Temporarily remove any bevel/taper/profile settings from the curve
+    data of 'objs' and re-evaluate 'depsgraph' once for all of them.
+    The original settings are restored on exit.
+    """
+    saved = {}
+    for obj in objs:
+        if obj.type == 'CURVE' and obj.data not in saved:
+            saved[obj.data] = {key: getattr(obj.data, key) for key in CURVE_PROFILE_SETTINGS}
+            for key, value in CURVE_PROFILE_SETTINGS.items():
+                setattr(obj.data, key, value)
+    if saved:
+        depsgraph.update()
+    try:
+        yield
+    finally:
+        for curve, settings in saved.items():
+            for key, value in settings.items():
+                setattr(curve, key, value)
+
 def resample_and_polniearize(obj, handle_distance, merge_threshold):
     """
-    Duplicate 'obj', apply all its modifiers on the duplicate,
-    and set the duplicate's origin to its geometry's median.
-    Returns the new, prepared object.
+    Convert 'obj' to world space polylines and resample them at
+    'handle_distance'. Returns a list of (N, 3) arrays, one per rail,
+    including the margin handles at both ends.
+    """
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    with curve_profiles_disabled([obj], depsgraph):
+        raw_polylines = evaluate_raw_polylines(obj, merge_threshold, depsgraph)
+    return build_rails(raw_polylines, handle_distance)
+
+def evaluate_raw_polylines(obj, merge_threshold, depsgraph):
+    """
+    Read the evaluated geometry of 'obj' and extract its world space
+    polylines. Returns a list of (N, 3) arrays.
+    """
+    arrays = evaluate_object_arrays(obj, depsgraph)
+    if arrays is None:
+        return []
+    return rail_geometry.polylines_from_edges(*arrays, distance=merge_threshold)
+
+def evaluate_object_arrays(obj, depsgraph):
+    """
+    Read the evaluated geometry of 'obj' (all modifiers applied) from
+    'depsgraph' as world space (points, edges) arrays, or None if the
+    object has no geometry.
+    Curve profiles have to be disabled first, see curve_profiles_disabled.
+    Nothing is linked into the scene and the selection is left untouched.
     """
-    # 1. Duplicate the object and its data
-    clone = obj.copy()
-    clone.data = obj.data.copy()
-    obj.users_collection[0].objects.link(clone)
-
-    # 2. If it’s a curve, remove any bevel/taper/profile settings
-    if clone.type == 'CURVE':
-        cd = clone.data
-        # zero out bevel depth and resolution
-        cd.bevel_depth = 0.0
-        cd.bevel_resolution = 0
-        # disable any extrude, taper, or bevel objects
-        cd.extrude = 0.0
-        cd.taper_object = None
-        cd.bevel_object = None
-        cd.offset = 0.0
-
-    # 3. Select & activate the clone
-    bpy.ops.object.select_all(action='DESELECT')
-    clone.select_set(True)
-    bpy.context.view_layer.objects.active = clone
-
-    # 4. Convert to mesh (bakes all modifiers, and now there’s no curve profile)
-    bpy.ops.object.convert(target='MESH')
-
-    bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-
-    raw_polylines = extract_polylines_from_mesh(clone.data, distance=merge_threshold)
-
-    sampled_polylines = [
-        resample_polyline_at_fixed_interval(pl, target_step=handle_distance)
-        for pl in raw_polylines
-    ]
-
-    rails = []
-    for poly in sampled_polylines:
-        margin_in = 2 * poly[0] - poly[1]
-        margin_out = 2 * poly[-1] - poly[-2]
-        rails.append([margin_in] + poly + [margin_out])
-
-    bpy.data.objects.remove(clone, do_unlink=True)
-    return rails
-
-def extract_polylines_from_mesh(mesh, sharp_angle_threshold=90, distance=1e-1):
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    if mesh is None:
+        return None
+
+    try:
+        return read_mesh_arrays(mesh, matrix=eval_obj.matrix_world)
+    finally:
+        eval_obj.to_mesh_clear()
+
+def read_spline_job(obj, depsgraph, merge_threshold):
+    """
+    Read the Bezier and poly splines of a curve object straight from their
+    control points as a world space SplineJob, so they can be sampled
+    analytically (see rail_geometry.sample_splines) instead of through a
+    mesh. Returns None if the object needs the mesh path: anything but a
+    curve, curves with modifiers or shape keys, NURBS splines, and open
+    spline ends closer than 'merge_threshold', which the mesh path joins
+    into one rail.
+    """
+    if obj.type != 'CURVE' or obj.modifiers or obj.data.shape_keys:
+        return None
+    eval_obj = obj.evaluated_get(depsgraph)
+    splines = eval_obj.data.splines
+    if not len(splines) or any(spline.type not in {'BEZIER', 'POLY'} for spline in splines):
+        return None
+
+    points, lefts, rights = [], [], []
+    for spline in splines:
+        if spline.type == 'BEZIER':
+            arrays = []
+            for attr in ('co', 'handle_left', 'handle_right'):
+                values = np.empty(len(spline.bezier_points) * 3, dtype=np.float32)
+                spline.bezier_points.foreach_get(attr, values)
+                arrays.append(values.reshape(-1, 3))
+            co, left, right = arrays
+        else:
+            values = np.empty(len(spline.points) * 4, dtype=np.float32)
+            spline.points.foreach_get('co', values)
+            co = values.reshape(-1, 4)[:, :3]
+            # Handles a third of the way to the neighbours keep segments straight
+            before, after = np.roll(co, 1, axis=0), np.roll(co, -1, axis=0)
+            if not spline.use_cyclic_u and len(co):
+                before[0], after[-1] = co[0], co[-1]
+            left, right = co + (before - co) / 3.0, co + (after - co) / 3.0
+        points.append(co)
+        lefts.append(left)
+        rights.append(right)
+
+    sizes = np.array([len(co) for co in points], dtype=np.int64)
+    cyclic = np.array([spline.use_cyclic_u for spline in splines], dtype=bool)
+    matrix = np.array(eval_obj.matrix_world, dtype=np.float64)
+    points, lefts, rights = (np.concatenate(arrays).astype(np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+                             for arrays in (points, lefts, rights))
+
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    open_splines = ~cyclic & (sizes >= 2)
+    ends = points[np.concatenate((starts[open_splines], starts[open_splines] + sizes[open_splines] - 1))]
+    if np.any(rail_geometry.weld_points(ends, merge_threshold) != np.arange(len(ends))):
+        return None
+    return rail_geometry.SplineJob(points, lefts, rights, sizes, cyclic)
+
+def build_rails(raw_polylines, handle_distance):
+    """
+    Resample all 'raw_polylines' in one batched call and add the margin
+    handles. Returns a list of (N, 3) arrays in the same order.
+    """
+    sampled_polylines = rail_geometry.resample_polylines(raw_polylines, target_step=handle_distance)
+    return [rail_geometry.add_margins(poly) for poly in sampled_polylines]
+
+def read_mesh_arrays(mesh, matrix=None):
+    """
+    Read the vertices and edges of a Mesh datablock in bulk.
+    If 'matrix' is given the coordinates are transformed by it.
+    Returns (points, edges) as (N, 3) float64 and (M, 2) int arrays.
+    """
+    points = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', points)
+    points = points.reshape(-1, 3).astype(np.float64)
+    if matrix is not None:
+        matrix = np.array(matrix, dtype=np.float64)
+        points = points @ matrix[:3, :3].T + matrix[:3, 3]
+
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    return points, edges.reshape(-1, 2)
+
+def extract_polylines_from_mesh(mesh, sharp_angle_threshold=90, distance=1e-1, matrix=None):
     """
     Given a Mesh datablock whose edges form one or more 1D graphs,
-    return a list of polylines (each a list of (x,y,z) coords).
-    
-    Splits occur at vertices of valence != 2.
+    return a list of polylines (each an (N, 3) array of coords).
+    If 'matrix' is given the coordinates are transformed by it first.
+
+    Splits occur at vertices of valence != 2. Chain endpoints closer than
+    'distance' are snapped together, see rail_geometry.polylines_from_edges.
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.verts.ensure_lookup_table()
-
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=distance)
-
-    # Build adjacency map: vertex index -> set of connected vertex indices
-    adjacency = {}
-    for edge in bm.edges:
-        v1, v2 = edge.verts[0].index, edge.verts[1].index
-        adjacency.setdefault(v1, set()).add(v2)
-        adjacency.setdefault(v2, set()).add(v1)
-
-    # Build edge set for tracking which edges we've used
-    unused_edges = {frozenset((e.verts[0].index, e.verts[1].index)) for e in bm.edges}
-    polylines = []
-
-    def walk(start_idx, prev_idx=None):
-        path = [start_idx]
-        current = start_idx
-
-        while True:
-            neighbors = [v for v in adjacency[current] if v != prev_idx]
-            if len(neighbors) != 1:
-                break
-
-            next_idx = neighbors[0]
-            edge_key = frozenset((current, next_idx))
-            if edge_key not in unused_edges:
-                break
-
-            # Check angle at current vertex
-            if prev_idx is not None:
-                bm.verts.ensure_lookup_table()
-                v_prev = bm.verts[prev_idx].co
-                v_curr = bm.verts[current].co
-                v_next = bm.verts[next_idx].co
-
-                dir1 = (v_curr - v_prev).normalized()
-                dir2 = (v_next - v_curr).normalized()
-
-                angle = dir1.angle(dir2, any)
-                if degrees(angle) > sharp_angle_threshold:
-                    break  # split at sharp turn
-
-            unused_edges.remove(edge_key)
-            path.append(next_idx)
-            prev_idx, current = current, next_idx
-
-        return path
-
-    # 1. Handle endpoints first (valence 1)
-    endpoints = [vid for vid, nbrs in adjacency.items() if len(nbrs) == 1]
-    for ep in endpoints:
-        for neighbor in adjacency[ep]:
-            edge_key = frozenset((ep, neighbor))
-            if edge_key in unused_edges:
-                unused_edges.remove(edge_key)
-                path = walk(neighbor, prev_idx=ep)
-                polylines.append([ep] + path)
-
-    # 2. Handle remaining edges (loops or chains with valence=2)
-    while unused_edges:
-        edge = next(iter(unused_edges))
-        a, b = tuple(edge)
-        unused_edges.remove(edge)
-        forward = walk(b, prev_idx=a)
-        backward = walk(a, prev_idx=b)
-        backward.reverse()
-        full = backward[:-1] + [a] + forward
-        polylines.append(full)
-
-    # Convert vertex indices to positions
-    result = []
-    bm.verts.ensure_lookup_table()
-    for poly in polylines:
-        coords = [bm.verts[i].co.copy() for i in poly]
-        result.append(coords)
-
-    bm.free()
-    return result
+    points, edges = read_mesh_arrays(mesh, matrix)
+    return rail_geometry.polylines_from_edges(
+        points,
+        edges,
+        sharp_angle_threshold=sharp_angle_threshold,
+        distance=distance,
+    )
 
 def resample_polyline_at_fixed_interval(polyline, target_step=5.0):
     """
@@ -168,55 +197,114 @@ def resample_polyline_at_fixed_interval(polyline, target_step=5.0):
       - the distance between consecutive points is constant,
       - that constant is total_length // target_step (rounded up) exactly partitioned.
 
+    Single polyline wrapper around rail_geometry.resample_polylines,
+    prefer that one when resampling many polylines.
+
     :param polyline: list[Vector] original vertices
     :param target_step: preferred spacing in meters
     :return: list[Vector] resampled points
     """
     if len(polyline) < 2:
         return [p.copy() for p in polyline]
+    return [Vector(p) for p in rail_geometry.resample_polylines([polyline], target_step)[0]]
 
-    # 1. Compute segment lengths and cumulative lengths
-    seg_lens = []
-    for i in range(len(polyline) - 1):
-        seg_lens.append((polyline[i+1] - polyline[i]).length)
-    total_length = sum(seg_lens)
-
-    # 2. Determine number of intervals (must be at least 1)
-    count = max(1, int(round(total_length / target_step)))
-    # Recompute step so it partitions exactly
-    step = total_length / count
-
-    resampled = [polyline[0].copy()]
-    distances = [0.0]  # cumulative along resampled
-
-    # 3. Walk through target distances 1*step, 2*step, ..., (count-1)*step
-    seg_idx = 0
-    seg_acc = 0.0  # how far we've walked along current segment
-
-    for n in range(1, count):
-        target_d = n * step
-        # Advance seg_idx until cumulative segment length surpasses target_d
-        while seg_idx < len(seg_lens) and (seg_acc + seg_lens[seg_idx]) < target_d:
-            seg_acc += seg_lens[seg_idx]
-            seg_idx += 1
-        # if we've run out of segments, clamp to last point
-        if seg_idx >= len(seg_lens):
-            resampled.append(polyline[-1].copy())
-            distances.append(total_length)
-            continue
-
-        # We know target_d lies within segment seg_idx between
-        # original points polyline[seg_idx] and polyline[seg_idx+1]
-        local_t = (target_d - seg_acc) / seg_lens[seg_idx]
-        p = polyline[seg_idx].lerp(polyline[seg_idx+1], local_t)
-        resampled.append(p.copy())
-        distances.append(target_d)
-
-    # 4. Finally append the exact last point
-    resampled.append(polyline[-1].copy())
-    distances.append(total_length)
-
-    return resampled
+def has_export_context(context):
+    """
+    The export runs from the 3D viewport/menu, or headless in a
+    'blender --background' session which has no space_data at all.
+    """
+    if bpy.app.background:
+        return True
+    return context.space_data is not None and context.space_data.type != 'FILE_BROWSER'
+
+def export_dasset(context, options, run=None):
+    """
+    Export the rails of the scene to a .dasset file.
+
+    'options' is the export operator or any object with the same
+    attributes (filepath, export_selected_only, east, north, elevation,
+    apply_geolocation, handle_distance, merge_threshold, adaptive_handles,
+    max_deviation, workers, use_cache, cache_size_mb, compact_json, precision), see
+    batch_export_dasset.py.
+    Stage timings are recorded in 'run' (see instrumentation.OperatorRun).
+    Returns a dict with object, rail and cache hit/miss counts, the
+    model.json encode time, the archive size and a list of warnings.
+    """
+    run = run or OperatorRun("Export dProB Rail Asset")
+    if options.export_selected_only:
+        curve_objs = [obj for obj in context.selected_objects]
+    else:
+        curve_objs = [obj for obj in bpy.data.objects if obj.type == 'CURVE']
+
+    # Get filename without extension
+    file_base_name = os.path.splitext(os.path.basename(options.filepath))[0]
+
+    # Only reading the evaluated geometry needs the main thread,
+    # the numeric stages run in rail_geometry.sample_rails_parallel. Plain curves are read
+    # as splines, everything else is evaluated to a mesh.
+    jobs = []
+    job_names = []
+    with run.stage("read"):
+        depsgraph = context.evaluated_depsgraph_get()
+        spline_jobs = {obj: read_spline_job(obj, depsgraph, options.merge_threshold) for obj in curve_objs}
+        mesh_objs = [obj for obj in curve_objs if spline_jobs[obj] is None]
+        with curve_profiles_disabled(mesh_objs, depsgraph):
+            for obj in curve_objs:
+                job = spline_jobs[obj]
+                if job is None:
+                    job = evaluate_object_arrays(obj, depsgraph)
+                if job is not None:
+                    jobs.append(job)
+                    job_names.append(obj.name)
+
+    max_deviation = options.max_deviation if options.adaptive_handles else None
+
+    # Objects whose geometry and settings did not change are read from the cache
+    cache = rail_cache.RailCache.for_blend(bpy.data.filepath, options.cache_size_mb * 1024 * 1024) if options.use_cache else None
+    rails_per_obj = [None] * len(jobs)
+    keys = [None] * len(jobs)
+    if cache is not None:
+        with run.stage("cache_read"):
+            for i, job in enumerate(jobs):
+                keys[i] = rail_cache.RailCache.key(job, options.handle_distance, options.merge_threshold, max_deviation)
+                rails_per_obj[i] = cache.get(keys[i])
+
+    todo = [i for i, rails in enumerate(rails_per_obj) if rails is None]
+    warnings = []
+    with run.stage("sample"):
+        sampled = rail_geometry.sample_rails_parallel([jobs[i] for i in todo], options.handle_distance, options.merge_threshold,
+                                        workers=options.workers, max_deviation=max_deviation, warnings=warnings)
+    with run.stage("cache_write"):
+        for i, rails in zip(todo, sampled):
+            rails_per_obj[i] = rails
+            if cache is not None:
+                cache.put(keys[i], rails)
+        if cache is not None:
+            cache.evict()
+
+    offset = [options.east, options.north, options.elevation] if options.apply_geolocation else [0.0, 0.0, 0.0]
+
+    geolocation = {
+        "East": options.east,
+        "Elevation": options.elevation,
+        "North": options.north
+    }
+
+    with run.stage("write"):
+        written = dasset_writer.write_dasset(options.filepath, file_base_name, geolocation, dasset_writer.rail_dicts(zip(job_names, rails_per_obj), offset),
+                               compact=options.compact_json, precision=options.precision if options.precision >= 0 else None)
+    run.count(objects=len(jobs), rails=written["rails"], warnings=len(warnings))
+
+    return {
+        "objects": len(jobs),
+        "spline_objects": len(curve_objs) - len(mesh_objs),
+        "rails": written["rails"],
+        "encode_seconds": written["encode_seconds"],
+        "bytes": written["bytes"],
+        "cache_hits": cache.hits if cache is not None else None,
+        "cache_misses": cache.misses if cache is not None else None,
+        "warnings": warnings,
+    }
 
 class ExportDProBRailAssetOperator(bpy.types.Operator, ExportHelper):
     bl_idname = "export_scene.dprobrailasset"
@@ -266,65 +354,83 @@ class ExportDProBRailAssetOperator(bpy.types.Operator, ExportHelper):
          step=0.05,
     )
 
+    adaptive_handles: bpy.props.BoolProperty(
+         name="Adaptive Handles",
+         description="Drop handles the spline does not need, more on straight track than in curves",
+         default=False,
+    )
+
+    max_deviation: bpy.props.FloatProperty(
+         name="Max Deviation",
+         description="Largest distance of the spline through the remaining handles from the resampled track and the mesh vertices between its handles",
+         default=0.02,
+         min=0.001,
+         step=0.1,
+         unit='LENGTH',
+    )
+
+    workers: bpy.props.IntProperty(
+         name="Worker Processes",
+         description="Processes used for polyline extraction and resampling (1 = serial, 0 = all cores)",
+         default=1,
+         min=0,
+         max=256,
+    )
+
+    use_cache: bpy.props.BoolProperty(
+         name="Use Cache",
+         description="Reuse resampled rails of unchanged objects, cached next to the .blend file",
+         default=True,
+    )
+
+    cache_size_mb: bpy.props.IntProperty(
+         name="Cache Size (MB)",
+         description="Least recently used cache entries are removed above this size",
+         default=512,
+         min=1,
+    )
+
+    compact_json: bpy.props.BoolProperty(
+         name="Compact JSON",
+         description="Write model.json without indentation (smaller, same content)",
+         default=False,
+    )
+
+    precision: bpy.props.IntProperty(
+         name="Decimals",
+         description="Decimals of the handle coordinates, 3 = millimetres, -1 = full float precision",
+         default=3,
+         min=-1,
+         max=12,
+    )
+
     @classmethod
     def description(cls, context, properties):
         return "Export splines in dProB Rail Asset format"
 
+    @instrumented
     def execute(self, context):
-        if context.space_data is None or context.space_data.type == 'FILE_BROWSER':
+        if not has_export_context(context):
             return {'CANCELLED'}
         if not self.filepath:
             self.report({'ERROR'}, "No filepath provided.")
             return {'CANCELLED'}
 
-        if self.export_selected_only:
-            curve_objs = [obj for obj in context.selected_objects]
-        else:
-            curve_objs = [obj for obj in bpy.data.objects if obj.type == 'CURVE']
-
-        # Get filename without extension
-        file_base_name = os.path.splitext(os.path.basename(self.filepath))[0]
-
-        export_data = {
-            "Name": file_base_name,
-            "GeoLocation": {
-                "East": self.east,
-                "Elevation": self.elevation,
-                "North": self.north
-            },
-            "Rails": []
-        }
-
-        amount_done = 0
-        for obj in curve_objs:
-            for sampled_pts in resample_and_polniearize(obj, self.handle_distance, self.merge_threshold):
-                spline_data = {
-                    "Name": obj.name,
-                    "SplineHandles": 
-                        [{"X": pt.x - self.east, "Y": pt.z - self.elevation, "Z": pt.y - self.north} for pt in sampled_pts] if self.apply_geolocation else [{"X": pt.x, "Y": pt.z, "Z": pt.y} for pt in sampled_pts],
-                    "SplineType": "Centripetal"
-                }
-                export_data["Rails"].append(spline_data)
-                amount_done += 1
-
-        json_str = json.dumps(export_data, indent=4)
-
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.writestr("model.json", json_str)
-            zip_file.writestr("dProB_asset_metadata.json", '{"Format":"Rails","ProductVersion":"Simulation 2024.2.9"}')
-            zip_file.writestr("asset_guid.txt", str(uuid.uuid4()))
-
         try:
-            with open(self.filepath, "wb") as f:
-                f.write(zip_buffer.getvalue())
+            stats = export_dasset(context, self, self._run)
         except Exception as e:
             self.report({'ERROR'}, f"Failed to write file: {e}")
             return {'CANCELLED'}
 
-        self.report({'INFO'}, f"Exported {amount_done} curve(s).")
+        for warning in stats["warnings"]:
+            self.report({'WARNING'}, warning)
+        message = (f"Exported {stats['rails']} curve(s), {stats['bytes'] / 1024 / 1024:.2f} MB, "
+                   f"model.json encoded in {stats['encode_seconds']:.2f}s.")
+        if stats["cache_hits"] is not None:
+            message += f" Cache: {stats['cache_hits']} hit(s), {stats['cache_misses']} miss(es)."
+        self.report({'INFO'}, message)
         return {'FINISHED'}
 
     @classmethod
     def poll(cls, context):
-        return context.space_data is not None and context.space_data.type != 'FILE_BROWSER'
\ No newline at end of file
+        return has_export_context(context)
\ No newline at end of file
@@ -1,16 +1,7 @@
 import bpy
 import os
 
-def register():
-    # Path to the user's presets folder
-    preset_dir = bpy.utils.user_resource('SCRIPTS', path="presets/operator/export_scene.fbx", create=True)
-    preset_path = os.path.join(preset_dir, "🏗️_dProB_defaults.py")
-
-    if os.path.isfile(preset_path):
-        return
-
-    # Contents of the preset
-    preset_contents = '''\
+PRESET_CONTENTS = '''\
 import bpy
 op = bpy.context.active_operator
 
@@ -19,6 +10,28 @@ op.path_mode = 'COPY'
 op.embed_textures = True
 '''
 
+# The preset is checked at most once per session
+_installed = False
+
+def install_preset():
+    """
+    Write the preset to the user's presets folder. Called by the operators
+    preparing objects for the FBX export instead of on register(), so
+    enabling the add-on touches no files.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    # Path to the user's presets folder
+    preset_dir = bpy.utils.user_resource('SCRIPTS', path="presets/operator/export_scene.fbx", create=True)
+    preset_path = os.path.join(preset_dir, "🏗️_dProB_defaults.py")
+
+    # An existing preset may have been edited by the user
+    if os.path.isfile(preset_path):
+        return
+
     # Write the preset file
     with open(preset_path, 'w') as f:
-        f.write(preset_contents)
\ No newline at end of file
+        f.write(PRESET_CONTENTS)
@@ -0,0 +1,196 @@
+import bpy
+from . import fbx_export_preset
+from .clean_reduce_ifc import DISSOLVE_MAX_FACES, clean_and_decimate, collect_mesh_users, deduplicate_meshes
+from .instrumentation import OperatorRun, instrumented
+from .lazy_import import lazy_import
+
+np = lazy_import("numpy")
+mesh_metrics = lazy_import(".mesh_metrics", __package__)
+
+# Screen height in pixels and the error in pixels tolerated when a LOD
+# level is switched in, used to turn screen sizes into geometric errors
+SCREEN_HEIGHT = 1080
+PIXEL_ERROR = 1.0
+
+LOD_GROUP_SUFFIX = "_LODGroup"
+
+# Custom properties marking the LOD group empties and the level of their
+# children, names may have been changed by the user or by Blender
+LOD_GROUP_PROP = "bii_lod_group"
+LOD_LEVEL_PROP = "bii_lod_level"
+
+class GenerateLodsOperator(bpy.types.Operator):
+    """Generate a LOD0-LOD3 chain for every selected mesh object"""
+    bl_idname = "object.generate_lods_operator"
+    bl_label = "Generate LODs"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented
+    def execute(self, context):
+        wm = context.window_manager
+        targets = wm.lod_screen_sizes if wm.lod_mode == 'SCREEN' else wm.lod_errors
+        # LOD groups are exported with the dProB FBX preset
+        fbx_export_preset.install_preset()
+        stats = generate_lods(context, wm.lod_mode, list(targets), wm.lod_deduplicate, self._run)
+        if not stats:
+            self.report({'INFO'}, "No mesh objects selected.")
+            return {'CANCELLED'}
+
+        triangles = " / ".join(f"{count:,}" for count in stats["triangles"])
+        self.report({'INFO'}, f"Generated LODs for {stats['objects']} objects from {stats['unique_meshes']} unique meshes. "
+                              f"Triangles per level: {triangles}.")
+        return {'FINISHED'}
+
+def lod_errors(diagonals, mode, targets):
+    """
+    Max geometric error per mesh (rows) and LOD level (columns), LOD1 and up.
+    In 'ERROR' mode 'targets' are the errors in metres. In 'SCREEN' mode
+    they are screen sizes, the fraction of the screen height the bounding
+    box covers when the level is switched in; a level may then be off by
+    PIXEL_ERROR pixels.
+    """
+    diagonals = np.asarray(diagonals, dtype=np.float64)[:, None]
+    targets = np.asarray(targets, dtype=np.float64)[None, :]
+    if mode == 'SCREEN':
+        return diagonals * PIXEL_ERROR / (targets * SCREEN_HEIGHT)
+    return np.broadcast_to(targets, (diagonals.shape[0], targets.shape[1]))
+
+def build_lod_meshes(context, meshes, errors):
+    """
+    Decimated copies of 'meshes' for every column of 'errors', each level
+    reduced from the one before. Returns a list [LOD1, LOD2, ...] per mesh.
+    """
+    triangles = [mesh_metrics.triangle_count(mesh) for mesh in meshes]
+    diagonals = [mesh_metrics.bounding_box_diagonal(mesh) for mesh in meshes]
+
+    lods = [[] for _ in meshes]
+    previous = list(meshes)
+    for level in range(errors.shape[1]):
+        targets = mesh_metrics.allocate_triangles(triangles, diagonals, max_error=errors[:, level])
+        copies = []
+        for mesh, source in zip(meshes, previous):
+            copy = source.copy()
+            copy.name = f"{mesh.name}_LOD{level + 1}"
+            copies.append(copy)
+        clean_and_decimate(context, copies, 1.0, targets.tolist(), DISSOLVE_MAX_FACES)
+        for chain, copy in zip(lods, copies):
+            chain.append(copy)
+        previous = copies
+    return lods
+
+def lod_level(obj):
+    # LOD level of an object in a LOD group, None for any other object
+    group = obj.parent
+    if group is None or not group.get(LOD_GROUP_PROP):
+        return None
+    return obj.get(LOD_LEVEL_PROP)
+
+def is_generated_lod(obj):
+    # LOD1 and up, added by link_lod_group
+    level = lod_level(obj)
+    return level is not None and level > 0
+
+def is_ifc_object(obj):
+    # Bonsai writes renames of IFC objects back to the element's Name
+    try:
+        import bonsai.tool as tool
+    except ImportError:
+        return False
+    return tool.Ifc.get_entity(obj) is not None
+
+def link_lod_group(obj, chain):
+    """
+    Turn 'obj' into LOD0 of an empty '<name>_LODGroup' taking its place,
+    and add one child '<name>_LOD<n>' per mesh in 'chain' (LOD1 and up).
+    The FBX exporter keeps this hierarchy, and game engines import the
+    _LOD<n> children of a group as its LOD levels. 'obj' is renamed to
+    '<name>_LOD0' unless it is an IFC object or that name is taken.
+    Simple custom properties of 'obj' are copied to the group so they are
+    exported as well. Groups and levels are marked with the LOD_GROUP_PROP
+    and LOD_LEVEL_PROP custom properties. For an object that already is a
+    LOD0, the levels of its group are replaced.
+    """
+    if lod_level(obj) == 0:
+        group = obj.parent
+        base = obj.name[:-len("_LOD0")] if obj.name.endswith("_LOD0") else obj.name
+        for child in group.children:
+            if child != obj:
+                bpy.data.objects.remove(child, do_unlink=True)
+    else:
+        base = obj.name
+        group = bpy.data.objects.new(f"{base}{LOD_GROUP_SUFFIX}", None)
+        for collection in obj.users_collection:
+            collection.objects.link(group)
+        group.parent = obj.parent
+        group.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+        group.matrix_basis = obj.matrix_basis.copy()
+        for key, value in obj.items():
+            if isinstance(value, (int, float, str)) and key not in (LOD_GROUP_PROP, LOD_LEVEL_PROP):
+                group[key] = value
+        group[LOD_GROUP_PROP] = True
+
+        # The original object stays in the scene once, as LOD0
+        obj.parent = group
+        obj.matrix_parent_inverse.identity()
+        obj.matrix_basis.identity()
+        obj[LOD_LEVEL_PROP] = 0
+        if not is_ifc_object(obj) and f"{base}_LOD0" not in bpy.data.objects:
+            obj.name = f"{base}_LOD0"
+
+    for level, mesh in enumerate(chain, start=1):
+        child = bpy.data.objects.new(f"{base}_LOD{level}", mesh)
+        for collection in obj.users_collection:
+            collection.objects.link(child)
+        child.parent = group
+        child[LOD_LEVEL_PROP] = level
+
+def generate_lods(context, mode, targets, deduplicate=False, run=None):
+    """
+    Build the LOD chain of every unique mesh of the selected objects once
+    and link it into a LOD group per object, see link_lod_group. LOD0 is
+    the original object. With 'deduplicate' geometrically identical meshes
+    are first linked to one mesh, which moves the origins of the objects
+    using them (see clean_reduce_ifc.link_duplicates).
+    Returns stats or None if no mesh object is selected.
+    """
+    run = run or OperatorRun(GenerateLodsOperator.bl_label)
+    # Generated levels are not reduced again, a selected LOD0 regenerates its group
+    objects = [obj for obj in context.selected_objects if not is_generated_lod(obj)]
+    mesh_to_objects = collect_mesh_users(objects)
+    if not mesh_to_objects:
+        return None
+
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    if deduplicate:
+        with run.stage("deduplicate"):
+            mesh_to_objects, _, _ = deduplicate_meshes(mesh_to_objects)
+
+    items = list(mesh_to_objects.items())
+    meshes = [mesh_data for mesh_data, _ in items]
+    with run.stage("decimate"):
+        errors = lod_errors([mesh_metrics.bounding_box_diagonal(mesh) for mesh in meshes], mode, targets)
+        lods = build_lod_meshes(context, meshes, errors)
+
+    triangles = [0] * (len(targets) + 1)
+    with run.stage("link"):
+        for (mesh_data, objects), chain in zip(items, lods):
+            chain = [mesh_data] + chain
+            for level, mesh in enumerate(chain):
+                triangles[level] += mesh_metrics.triangle_count(mesh) * len(objects)
+            for obj in objects:
+                link_lod_group(obj, chain[1:])
+
+    stats = {
+        "unique_meshes": len(items),
+        "objects": sum(len(objects) for _, objects in items),
+        "triangles": triangles,
+    }
+    run.count(meshes=stats["unique_meshes"], objects=stats["objects"])
+    return stats
+
+def register():
+    bpy.utils.register_class(GenerateLodsOperator)
+
+def unregister():
+    bpy.utils.unregister_class(GenerateLodsOperator)
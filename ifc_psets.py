@@ -0,0 +1,117 @@
+def find_pset_template(ifc_file, name):
+    for template in ifc_file.by_type("IfcPropertySetTemplate"):
+        if template.Name == name:
+            return template
+    return None
+
+def ensure_pset_template(ifc_file, name, prop_templates):
+    """
+    Add the property set template 'name' to 'ifc_file' unless it already
+    exists. 'prop_templates' is a list of keyword dicts for
+    pset_template.add_prop_template.
+    Returns True if the template was created.
+    """
+    import ifcopenshell.api
+
+    if find_pset_template(ifc_file, name) is not None:
+        return False
+
+    pset_template = ifcopenshell.api.run("pset_template.add_pset_template", ifc_file, name=name)
+    for prop_template in prop_templates:
+        ifcopenshell.api.run("pset_template.add_prop_template", ifc_file, pset_template=pset_template, **prop_template)
+    return True
+
+def _defining_relations(pset):
+    # IFC4 and later use DefinesOccurrence, IFC2X3 PropertyDefinitionOf
+    return list(getattr(pset, "DefinesOccurrence", None) or getattr(pset, "PropertyDefinitionOf", None) or ())
+
+def _detach_pset(ifc_file, pset, products):
+    """
+    Detach 'pset' from 'products' in every IfcRelDefinesByProperties
+    defining it, relations left without products are removed. The
+    property set is removed as well once no relation uses it any more.
+    """
+    import ifcopenshell.api
+
+    ifcopenshell.api.run("pset.unassign_pset", ifc_file, products=products, pset=pset)
+    if not _defining_relations(pset):
+        ifcopenshell.api.run("pset.remove_pset", ifc_file, product=products[0], pset=pset)
+
+def write_shared_psets(ifc_file, name, rows, measure_types):
+    """
+    Write the property set 'name' to many products at once.
+
+    Identical property values are created once as IfcPropertySingleValue
+    and shared by all property sets using them, and products with
+    identical values share one property set through a single
+    IfcRelDefinesByProperties. An existing property set 'name' on a
+    product is replaced. Note that editing a shared property set or
+    value later on changes it for every product using it.
+
+    :param rows: list of (product, {property name: value})
+    :param measure_types: dict property name -> IFC measure type, e.g. IfcLabel
+    :return: number of property sets created
+    """
+    import ifcopenshell.api
+    import ifcopenshell.util.element
+
+    # Products with equal values share a property set
+    groups = {}
+    replaced = {}
+    for product, values in rows:
+        # Property sets of the product's type are overridden, not replaced
+        old = ifcopenshell.util.element.get_pset(product, name, should_inherit=False)
+        if old:
+            replaced.setdefault(old["id"], []).append(product)
+        groups.setdefault(tuple(sorted(values.items())), []).append(product)
+
+    # Detach the replaced property sets from all their rows at once, a
+    # remove_pset call per product rewrites a shared relation every time
+    for pset_id, products in replaced.items():
+        _detach_pset(ifc_file, ifc_file.by_id(pset_id), products)
+
+    properties = {}
+
+    def single_value(prop_name, value):
+        key = (prop_name, value)
+        if key not in properties:
+            nominal = ifc_file.create_entity(measure_types[prop_name], value)
+            properties[key] = ifc_file.create_entity("IfcPropertySingleValue", Name=prop_name, NominalValue=nominal)
+        return properties[key]
+
+    for values, products in groups.items():
+        # One API call for owner history, GlobalId and the relation, then
+        # the remaining products are added to that same relation
+        pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=products[0], name=name)
+        pset.HasProperties = [single_value(prop_name, value) for prop_name, value in values]
+        if len(products) > 1:
+            relation = _defining_relations(pset)[0]
+            relation.RelatedObjects = list(relation.RelatedObjects) + products[1:]
+
+    return len(groups)
+
+def reserve_numbers(ifc_file, pset_name, prop_name, count, last_used=None):
+    """
+    Reserve 'count' consecutive numbers from a counter stored as the
+    property 'prop_name' of the property set 'pset_name' on the
+    IfcProject, so numbers stay unique across sessions.
+
+    :param last_used: function returning the highest number already in
+                      use, called for files without a stored counter
+    :return: the first reserved number
+    """
+    import ifcopenshell.api
+    import ifcopenshell.util.element
+
+    project = ifc_file.by_type("IfcProject")[0]
+    counter = ifcopenshell.util.element.get_pset(project, pset_name)
+    if counter:
+        pset = ifc_file.by_id(counter["id"])
+    else:
+        pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=project, name=pset_name)
+    last = counter.get(prop_name) if counter else None
+    if last is None:
+        last = last_used() if last_used else 0
+
+    ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties={prop_name: last + count})
+    return last + 1
@@ -0,0 +1,166 @@
+import functools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+LOG_NAME = "bii_tools_runs.jsonl"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# Last finished run per operator, shown in the BII Tools panel
+LAST_RUNS = {}
+
+_logger = None
+
+def log_directory():
+    """
+    Directory of the run log and profiles: 'bii_tools' in Blender's user
+    config directory, or the temp directory outside of Blender.
+    """
+    try:
+        import bpy
+        return bpy.utils.user_resource('CONFIG', path="bii_tools", create=True)
+    except (ImportError, AttributeError):
+        return tempfile.gettempdir()
+
+def run_logger():
+    # Created on the first finished run, so registering the add-on touches no files
+    global _logger
+    if _logger is None:
+        import logging
+        import logging.handlers
+
+        _logger = logging.getLogger("bii_tools.runs")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        # The logger outlives a reload of the add-on, which resets _logger
+        if not _logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_directory(), LOG_NAME), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger.addHandler(handler)
+    return _logger
+
+class OperatorRun:
+    """
+    Timings, object counts and peak memory of one operator run. Stages are
+    timed with stage() or add_time(), counts set with count(). finish()
+    appends the run as one JSON line to the rotating run log.
+    A run that is never started only collects, so code paths without an
+    operator (scripts, the batch export) can pass one around as well.
+    """
+
+    def __init__(self, name, trace_memory=False, profile=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.stages = {}
+        self.counts = {}
+        self.started = None
+        self._start_time = None
+        self._own_trace = False
+        self._profiler = None
+
+    def start(self):
+        self.started = time.time()
+        self._start_time = time.perf_counter()
+        if self.trace_memory:
+            # A run inside another one shares its trace
+            self._own_trace = not tracemalloc.is_tracing()
+            if self._own_trace:
+                tracemalloc.start()
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, **counts):
+        self.counts.update(counts)
+
+    def finish(self, status='FINISHED'):
+        """
+        Stop tracing and profiling and log the run. Returns the log entry.
+        """
+        entry = {
+            "operator": self.name,
+            "status": status,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)) if self.started else None,
+            "seconds": time.perf_counter() - self._start_time if self._start_time else sum(self.stages.values()),
+            "stages": self.stages,
+            "counts": self.counts,
+            "peak_mb": None,
+        }
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            entry["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            if self._own_trace:
+                tracemalloc.stop()
+        if self._profiler is not None:
+            self._profiler.disable()
+            directory = os.path.join(log_directory(), "profiles")
+            os.makedirs(directory, exist_ok=True)
+            entry["profile"] = os.path.join(directory, f"{self.name.replace(' ', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            self._profiler.dump_stats(entry["profile"])
+
+        LAST_RUNS[self.name] = entry
+        try:
+            run_logger().info(json.dumps(entry))
+        except OSError as e:
+            print(f"Could not write the run log: {e}")
+        return entry
+
+def begin_run(context, name):
+    """
+    Start a run with the instrumentation settings of the window manager.
+    """
+    wm = context.window_manager
+    return OperatorRun(name, getattr(wm, "bii_trace_memory", False), getattr(wm, "bii_profile", False)).start()
+
+def instrumented(execute):
+    """
+    Decorator for Operator.execute: records the run under the operator's
+    bl_label. The run is available as self._run while execute runs.
+    """
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        self._run = begin_run(context, self.bl_label)
+        try:
+            result = execute(self, context)
+        except Exception:
+            self._run.finish('ERROR')
+            raise
+        self._run.finish(next(iter(result), 'FINISHED'))
+        return result
+    return wrapper
+
+def summary_lines():
+    """
+    One line per operator with its last run, slowest stage first.
+    """
+    lines = []
+    for name, entry in sorted(LAST_RUNS.items()):
+        text = f"{name}: {entry['seconds']:.2f}s"
+        if entry["counts"]:
+            text += ", " + ", ".join(f"{value} {key}" for key, value in entry["counts"].items())
+        if entry["peak_mb"] is not None:
+            text += f", peak {entry['peak_mb']:.0f} MB"
+        lines.append(text)
+        if entry["stages"]:
+            stage, seconds = max(entry["stages"].items(), key=lambda item: item[1])
+            lines.append(f"    slowest: {stage} {seconds:.2f}s")
+    return lines
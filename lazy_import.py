@@ -0,0 +1,23 @@
+import importlib.util
+import sys
+
+def lazy_import(name, package=None):
+    """
+    Module 'name' whose body runs on its first attribute access instead
+    of now, so registering the add-on does not pay for NumPy and the
+    geometry modules. Relative names need 'package', as in
+    importlib.import_module. Already imported modules are returned as is.
+    """
+    name = importlib.util.resolve_name(name, package)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,279 @@
+import hashlib
+import numpy as np
+
+def read_mesh_triangles(mesh, matrix=None):
+    """
+    Read the vertex coordinates and loop triangles of a Mesh datablock
+    in bulk. If 'matrix' is given the coordinates are transformed by it.
+    Returns (points, triangles) as (N, 3) float64 and (T, 3) int arrays.
+    """
+    mesh.calc_loop_triangles()
+
+    points = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', points)
+    points = points.reshape(-1, 3).astype(np.float64)
+    if matrix is not None:
+        matrix = np.array(matrix, dtype=np.float64)
+        points = points @ matrix[:3, :3].T + matrix[:3, 3]
+
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangles)
+    return points, triangles.reshape(-1, 3)
+
+def signed_volume(points, triangles):
+    """
+    Signed volume of a closed triangle mesh (divergence theorem: sum of
+    the signed tetrahedra spanned by the origin and every triangle).
+    Same result as bmesh calc_volume(signed=True).
+    """
+    if not len(triangles):
+        return 0.0
+    v0, v1, v2 = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+    return float(np.einsum('ij,ij->', v0, np.cross(v1, v2)) / 6.0)
+
+def height(points):
+    """
+    Extent of the points along Z.
+    """
+    if not len(points):
+        return 0.0
+    z = points[:, 2]
+    return float(z.max() - z.min())
+
+def evaluated_metrics(obj, depsgraph):
+    """
+    Volume and height of the evaluated (modifiers applied) world space
+    mesh of 'obj'. The temporary mesh is freed right away, so memory
+    does not grow over large selections.
+    Returns (volume, height).
+    """
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    if mesh is None:
+        return 0.0, 0.0
+
+    try:
+        points, triangles = read_mesh_triangles(mesh, matrix=obj.matrix_world)
+    finally:
+        eval_obj.to_mesh_clear()
+    return signed_volume(points, triangles), height(points)
+
+def read_mesh_topology(mesh):
+    """
+    Read the local vertex coordinates, edges, polygon sizes, loop vertex
+    indices and polygon material indices of a Mesh datablock in bulk.
+    """
+    points = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', points)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_indices)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    return points.reshape(-1, 3).astype(np.float64), edges, loop_totals, loop_vertices, material_indices
+
+# foreach_get field, dtype and values per element of the attribute types
+# read by read_mesh_attributes
+ATTRIBUTE_FIELDS = {
+    'FLOAT': ('value', np.float32, 1),
+    'INT': ('value', np.int32, 1),
+    'INT8': ('value', np.int8, 1),
+    'BOOLEAN': ('value', np.bool_, 1),
+    'FLOAT2': ('vector', np.float32, 2),
+    'FLOAT_VECTOR': ('vector', np.float32, 3),
+    'FLOAT_COLOR': ('color', np.float32, 4),
+    'BYTE_COLOR': ('color', np.float32, 4),
+}
+
+# Attributes already covered by read_mesh_topology
+TOPOLOGY_ATTRIBUTES = {"position", "material_index"}
+
+def read_mesh_attributes(mesh):
+    """
+    Read the attributes of a Mesh datablock that read_mesh_topology does
+    not cover (UV maps, colors, sharp edges and faces, custom data) in
+    bulk. Internal attributes (names starting with '.') are skipped.
+    Returns a list of (name, domain, data type, flat array) sorted by
+    name, or None if the mesh has data that cannot be compared this way:
+    shape keys, custom split normals or attributes of another type.
+    """
+    if mesh.shape_keys is not None or mesh.has_custom_normals:
+        return None
+
+    attributes = []
+    for attribute in mesh.attributes:
+        if attribute.name in TOPOLOGY_ATTRIBUTES or attribute.name.startswith("."):
+            continue
+        if attribute.data_type not in ATTRIBUTE_FIELDS:
+            return None
+        field, dtype, size = ATTRIBUTE_FIELDS[attribute.data_type]
+        values = np.empty(len(attribute.data) * size, dtype=dtype)
+        attribute.data.foreach_get(field, values)
+        attributes.append((attribute.name, attribute.domain, attribute.data_type, values))
+
+    # Before Blender 3.5 UV maps are not attributes
+    names = {attribute[0] for attribute in attributes}
+    for uv_layer in mesh.uv_layers:
+        if uv_layer.name not in names:
+            values = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+            uv_layer.data.foreach_get('uv', values)
+            attributes.append((uv_layer.name, 'CORNER', 'FLOAT2', values))
+    return sorted(attributes, key=lambda attribute: attribute[0])
+
+def geometry_key(points, edges, loop_totals, loop_vertices, material_indices, tolerance=1e-4, attributes=()):
+    """
+    Hash of a mesh's geometry, equal for meshes that only differ by a
+    translation and by coordinate noise below 'tolerance'.
+    Coordinates are taken relative to the bounding box minimum, which is
+    returned as well so a match can be moved back into place.
+    'attributes' (see read_mesh_attributes) have to match exactly.
+    Returns (key, origin).
+    """
+    origin = points.min(axis=0) if len(points) else np.zeros(3)
+    quantized = np.rint((points - origin) / tolerance)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([len(points), len(edges), len(loop_totals)], dtype=np.int64).tobytes())
+    for array in (quantized, edges, loop_totals, loop_vertices, material_indices):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    for name, domain, data_type, values in attributes:
+        digest.update(f"{name}\0{domain}\0{data_type}\0{len(values)}\0".encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest(), origin
+
+def mesh_bytes(mesh):
+    """
+    Rough memory footprint of the geometry of a Mesh datablock.
+    """
+    return len(mesh.vertices) * 12 + len(mesh.edges) * 8 + len(mesh.loops) * 8 + len(mesh.polygons) * 12
+
+def triangle_count(mesh):
+    """
+    Number of triangles of a Mesh datablock once triangulated.
+    """
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    return int((loop_totals - 2).sum())
+
+def bounding_box_diagonal(mesh):
+    """
+    Length of the local bounding box diagonal of a Mesh datablock.
+    """
+    if not len(mesh.vertices):
+        return 0.0
+    points = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', points)
+    points = points.reshape(-1, 3)
+    return float(np.linalg.norm(points.max(axis=0) - points.min(axis=0)))
+
+def estimated_error(diagonals, triangles):
+    """
+    Geometric error estimate of a mesh with 'triangles' triangles: the
+    chordal error of a sphere with that bounding box tessellated into as
+    many triangles, pi * diagonal / (2 * triangles).
+    """
+    return np.pi * np.asarray(diagonals, dtype=np.float64) / (2.0 * np.maximum(np.asarray(triangles, dtype=np.float64), 1.0))
+
+def allocate_triangles(triangles, diagonals, instances=None, budget=None, max_error=None, min_triangles=12):
+    """
+    Target triangle count for every mesh, chosen so all meshes end up with
+    the same estimated error (see estimated_error). Targets never exceed
+    the current count and never drop below 'min_triangles'.
+
+    With 'max_error' (metres) the targets follow directly. With 'budget'
+    the common error is found by bisection, so that the triangles of all
+    meshes, weighted by their instance count, add up to the budget.
+
+    :return: (M,) int64 array of target triangle counts
+    """
+    triangles = np.asarray(triangles, dtype=np.float64)
+    diagonals = np.asarray(diagonals, dtype=np.float64)
+    weights = np.ones_like(triangles) if instances is None else np.asarray(instances, dtype=np.float64)
+    floor = np.minimum(min_triangles, triangles)
+
+    def targets(error):
+        return np.clip(np.ceil(np.pi * diagonals / (2.0 * error)), floor, triangles)
+
+    if max_error is not None:
+        return targets(max_error).astype(np.int64)
+
+    if (weights * triangles).sum() <= budget:
+        return triangles.astype(np.int64)
+    if (weights * floor).sum() >= budget:
+        return floor.astype(np.int64)
+
+    low, high = 1e-12, max(diagonals.max(), 1e-12) * np.pi
+    for _ in range(100):
+        mid = np.sqrt(low * high)
+        if (weights * targets(mid)).sum() > budget:
+            low = mid
+        else:
+            high = mid
+    return targets(high).astype(np.int64)
+
+def boundary_edges(mesh):
+    """
+    Indices of the boundary edges of a Mesh datablock, edges used by
+    exactly one face. Watertight meshes have none.
+    """
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('edge_index', loop_edges)
+    faces_per_edge = np.bincount(loop_edges, minlength=len(mesh.edges))
+    return np.flatnonzero(faces_per_edge == 1)
+
+def weld_indices(points, tolerance=1e-5):
+    """
+    Index of the first vertex at the same position (within 'tolerance')
+    for every vertex, so split vertices count as connected.
+    """
+    if not len(points):
+        return np.zeros(0, dtype=np.int64)
+    _, first, inverse = np.unique(np.rint(points / tolerance).astype(np.int64), axis=0, return_index=True, return_inverse=True)
+    return first[inverse.reshape(-1)]
+
+def edge_defects(triangles, vertex_count):
+    """
+    Edge-face incidence check of a triangle mesh.
+    Returns (boundary edges, non-manifold edges, flipped edges): edges used
+    by one triangle, by more than two, and edges two triangles traverse in
+    the same direction, i.e. neighbours with opposite normals.
+    """
+    if not len(triangles):
+        return 0, 0, 0
+    start = triangles.reshape(-1).astype(np.int64)
+    end = np.roll(triangles, -1, axis=1).reshape(-1).astype(np.int64)
+    undirected = np.minimum(start, end) * vertex_count + np.maximum(start, end)
+    _, counts = np.unique(undirected, return_counts=True)
+    _, directed_counts = np.unique(start * vertex_count + end, return_counts=True)
+    return int((counts == 1).sum()), int((counts > 2).sum()), int((directed_counts > 1).sum())
+
+def welded_triangles(points, triangles, tolerance=1e-5):
+    """
+    'triangles' with the vertex indices of weld_indices, without the
+    triangles collapsing by the weld.
+    """
+    if not len(triangles):
+        return triangles
+    welded = weld_indices(points, tolerance)[triangles]
+    return welded[(welded[:, 0] != welded[:, 1]) & (welded[:, 1] != welded[:, 2]) & (welded[:, 2] != welded[:, 0])]
+
+def mesh_defects(points, triangles, tolerance=1e-5, welded=None):
+    """
+    Watertightness check of a triangle mesh after welding vertices closer
+    than 'tolerance', see welded_triangles (pass 'welded' if already known).
+    Returns a dict with boundary_edges, non_manifold_edges, flipped_edges,
+    signed_volume and watertight.
+    """
+    if welded is None:
+        welded = welded_triangles(points, triangles, tolerance)
+    boundary, non_manifold, flipped = edge_defects(welded, len(points))
+    return {
+        "boundary_edges": boundary,
+        "non_manifold_edges": non_manifold,
+        "flipped_edges": flipped,
+        "signed_volume": signed_volume(points, triangles),
+        "watertight": bool(len(welded)) and boundary == 0 and non_manifold == 0,
+    }
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import numpy as np
+
+# Bump whenever the sampling output changes, so stale entries are not reused
+CACHE_VERSION = 4
+
+class RailCache:
+    """
+    On-disk cache of resampled rails, keyed on a hash of the evaluated
+    world space geometry of an object and the export settings.
+
+    Every entry is one .npz file, the file modification time is used as
+    the last access time for LRU eviction once the cache grows above
+    'max_bytes'.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_blend(cls, blend_path, max_bytes=512 * 1024 * 1024):
+        """
+        Cache stored next to the .blend file, or None for unsaved files.
+        """
+        if not blend_path:
+            return None
+        base, _ = os.path.splitext(blend_path)
+        return cls(base + "_rail_cache", max_bytes)
+
+    @staticmethod
+    def key(job, handle_distance, merge_threshold, max_deviation=0.0):
+        """
+        Hash of a sampling job, world space (points, edges) arrays or a
+        rail_geometry.SplineJob, and the sampling settings. Points are
+        already transformed by matrix_world, so a moved object gets a new key.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(np.array([CACHE_VERSION, handle_distance, merge_threshold, max_deviation or 0.0], dtype=np.float64).tobytes())
+        digest.update(type(job).__name__.encode())
+        for array in job:
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """
+        Return the cached list of rails for 'key', or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                points, sizes = data["points"], data["sizes"]
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return np.split(points, np.cumsum(sizes)[:-1]) if len(sizes) else []
+
+    def put(self, key, rails):
+        """
+        Store the list of rails for 'key'. Failures only print a warning,
+        the cache must never break an export.
+        """
+        sizes = np.array([len(rail) for rail in rails], dtype=np.int64)
+        points = np.concatenate(rails) if rails else np.empty((0, 3))
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                np.savez(f, points=points, sizes=sizes)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Could not write rail cache entry {path}: {e}")
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits 'max_bytes'.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npz")]
+            stats = sorted(((entry.stat(), entry.path) for entry in entries), key=lambda item: item[0].st_mtime)
+        except OSError:
+            return
+
+        total = sum(stat.st_size for stat, _ in stats)
+        for stat, path in stats:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= stat.st_size
+            except OSError as e:
+                print(f"Could not evict rail cache entry {path}: {e}")
@@ -0,0 +1,587 @@
+import multiprocessing
+import os
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from .spatial_groups import bin_points, cell_point_pairs, connected_components, neighbour_cell_pairs
+except ImportError:
+    # Imported as a top-level module by the benchmarks and tests
+    from spatial_groups import bin_points, cell_point_pairs, connected_components, neighbour_cell_pairs
+
+# Vertices sampled in one batch by sample_rails_parallel
+CHUNK_VERTICES = 200_000
+
+def as_point_array(points):
+    """
+    Convert a sequence of points (Vectors, tuples or an array) to a
+    contiguous (N, 3) float64 array.
+    """
+    return np.ascontiguousarray(np.asarray(points, dtype=np.float64).reshape(-1, 3))
+
+def resample_polylines(polylines, target_step=5.0):
+    """
+    Resample many polylines at once so that on each polyline:
+      - the first and last points are included,
+      - the distance between consecutive points is constant,
+      - that constant is total_length / round(total_length / target_step).
+
+    All polylines are concatenated into one (N, 3) array. Cumulative arc
+    length is taken over the whole array (segments bridging two polylines
+    are given zero length), target stations are located with a single
+    searchsorted and interpolated in one batch.
+
+    :param polylines: list of (N, 3) arrays (or lists of Vectors)
+    :param target_step: preferred spacing in meters
+    :return: list of (M, 3) float64 arrays, same order as the input
+    """
+    polylines = [as_point_array(pl) for pl in polylines]
+    result = [pl.copy() for pl in polylines]
+
+    # Polylines with less than two points are returned unchanged
+    todo = [i for i, pl in enumerate(polylines) if len(pl) >= 2]
+    if not todo:
+        return result
+
+    sizes = np.array([len(polylines[i]) for i in todo], dtype=np.int64)
+    points = np.concatenate([polylines[i] for i in todo])
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ends = starts + sizes - 1
+
+    # 1. Segment lengths and cumulative arc length over all polylines
+    seg_lens = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    seg_lens[ends[:-1]] = 0.0
+    cum = np.concatenate(([0.0], np.cumsum(seg_lens)))
+    totals = cum[ends] - cum[starts]
+
+    # 2. Number of intervals per polyline (at least 1) and exact step
+    counts = np.maximum(1, np.rint(totals / target_step).astype(np.int64))
+    steps = totals / counts
+
+    # 3. Target stations 0, step, ..., count*step for every polyline
+    out_sizes = counts + 1
+    out_starts = np.concatenate(([0], np.cumsum(out_sizes)[:-1]))
+    owner = np.repeat(np.arange(len(todo)), out_sizes)
+    n = np.arange(out_sizes.sum()) - out_starts[owner]
+    stations = cum[starts][owner] + n * steps[owner]
+
+    # 4. Locate the segment holding each station and interpolate
+    seg_idx = np.searchsorted(cum[1:], stations, side='left')
+    seg_idx = np.clip(seg_idx, starts[owner], ends[owner] - 1)
+    seg_len = seg_lens[seg_idx]
+    local_t = np.divide(stations - cum[seg_idx], seg_len,
+                        out=np.zeros_like(seg_len), where=seg_len > 0)
+    local_t = np.clip(local_t, 0.0, 1.0)[:, None]
+    resampled = points[seg_idx] + (points[seg_idx + 1] - points[seg_idx]) * local_t
+
+    # 5. Endpoints are always the exact source endpoints
+    resampled[out_starts] = points[starts]
+    resampled[out_starts + counts] = points[ends]
+
+    for i, pl in zip(todo, np.split(resampled, out_starts[1:])):
+        result[i] = pl
+    return result
+
+def add_margins(polyline):
+    """
+    Extend a polyline by one mirrored point at each end, so the
+    Centripetal spline in dProB passes through the real endpoints.
+    """
+    margin_in = 2 * polyline[0] - polyline[1]
+    margin_out = 2 * polyline[-1] - polyline[-2]
+    return np.vstack((margin_in, polyline, margin_out))
+
+def centripetal_segments(p0, p1, p2, p3, samples):
+    """
+    Evaluate Centripetal Catmull-Rom segments (alpha 0.5, the spline dProB
+    draws through the handles) between p1 and p2 with the Barry-Goldman
+    recursion, at 'samples' evenly spaced parameters including both ends.
+
+    :param p0, p1, p2, p3: (S, 3) control points of S segments
+    :return: (S, samples, 3) array
+    """
+    def knot(a, b):
+        # Coincident points get a tiny knot interval instead of a division by zero
+        return np.maximum(np.linalg.norm(b - a, axis=1) ** 0.5, 1e-9)[:, None, None]
+
+    t0 = np.zeros((len(p1), 1, 1))
+    t1 = t0 + knot(p0, p1)
+    t2 = t1 + knot(p1, p2)
+    t3 = t2 + knot(p2, p3)
+    t = t1 + (t2 - t1) * np.linspace(0.0, 1.0, samples)[None, :, None]
+    p0, p1, p2, p3 = (p[:, None, :] for p in (p0, p1, p2, p3))
+
+    a1 = ((t1 - t) * p0 + (t - t0) * p1) / (t1 - t0)
+    a2 = ((t2 - t) * p1 + (t - t1) * p2) / (t2 - t1)
+    a3 = ((t3 - t) * p2 + (t - t2) * p3) / (t3 - t2)
+    b1 = ((t2 - t) * a1 + (t - t0) * a2) / (t2 - t0)
+    b2 = ((t3 - t) * a2 + (t - t1) * a3) / (t3 - t1)
+    return ((t2 - t) * b1 + (t - t1) * b2) / (t2 - t1)
+
+def _source_stations(sources, sizes, starts):
+    """
+    Place the vertices of the polylines 'sources' was resampled from (see
+    resample_polylines) on the resampled polylines of 'sizes' points
+    starting at 'starts': by arc length every source vertex lies within
+    one interval between two stations.
+
+    :return: (points, interval, fraction) of all source vertices, interval
+             is the global index of the station before the vertex and
+             fraction its position in the interval from 0 to 1
+    """
+    used = [i for i, source in enumerate(sources) if source is not None and len(source) >= 2 and sizes[i] >= 2]
+    if not used:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    polylines = [as_point_array(sources[i]) for i in used]
+    source_sizes = np.array([len(pl) for pl in polylines], dtype=np.int64)
+    points = np.concatenate(polylines)
+    source_starts = np.concatenate(([0], np.cumsum(source_sizes)[:-1]))
+    owner = np.repeat(np.arange(len(used)), source_sizes)
+
+    # Arc length of every vertex along its own source polyline
+    seg_lens = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    seg_lens[(source_starts + source_sizes - 1)[:-1]] = 0.0
+    cum = np.concatenate(([0.0], np.cumsum(seg_lens)))
+    arc = cum - cum[source_starts][owner]
+    totals = arc[source_starts + source_sizes - 1]
+
+    intervals = sizes[used] - 1
+    position = np.divide(arc * intervals[owner], totals[owner], out=np.zeros_like(arc), where=totals[owner] > 0)
+    interval = np.clip(np.floor(position).astype(np.int64), 0, intervals[owner] - 1)
+    return points, starts[used][owner] + interval, position - interval
+
+def simplify_handles(polylines, max_deviation, samples=8, sources=None):
+    """
+    Keep only as many points of every polyline as the Centripetal spline
+    through them needs to stay within 'max_deviation' of all the others.
+
+    Starting from the endpoints, every spline segment is evaluated at
+    'samples' points and the distance of each dropped point to that
+    sampled segment is measured. In every round the worst point of each
+    segment above the tolerance is added, until no segment exceeds it.
+    Later rounds only measure the segments changed by the added points.
+    Straight track ends up with its two endpoints, tight curves keep
+    their points. End segments use the mirrored margins of add_margins.
+    All polylines are refined together.
+
+    With 'sources', the polylines the points were resampled from, the
+    source vertices between the stations are measured as well and a
+    vertex above the tolerance keeps its nearest dropped station. Only
+    source vertices between two neighbouring stations that are both kept
+    can stay above the tolerance, by at most the sag of the resampling.
+
+    :param polylines: list of (N, 3) arrays, e.g. from resample_polylines
+    :param max_deviation: tolerance in meters
+    :param sources: list with the source polyline (or None) of every polyline
+    :return: list of (M, 3) arrays, subsets of the input points
+    """
+    polylines = [as_point_array(pl) for pl in polylines]
+    if not polylines:
+        return []
+
+    sizes = np.array([len(pl) for pl in polylines], dtype=np.int64)
+    points = np.concatenate(polylines)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    owner = np.repeat(np.arange(len(polylines)), sizes)
+    if sources is not None:
+        source_points, source_interval, source_fraction = _source_stations(sources, sizes, starts)
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[starts] = True
+    keep[starts + sizes - 1] = True
+    added = keep.copy()
+
+    while True:
+        kept = np.flatnonzero(keep)
+        # Segments between consecutive kept points of the same polyline
+        seg = np.flatnonzero(owner[kept[:-1]] == owner[kept[1:]])
+        first, last = kept[seg], kept[seg + 1]
+        inner = last - first - 1
+        # A segment only changes with a point added to it or to one of its
+        # neighbours, the others were within the tolerance last round
+        fresh = np.concatenate(([False], added[kept], [False, False]))
+        changed = (fresh[:-3] | fresh[1:-2] | fresh[2:-1] | fresh[3:])[seg]
+        if not (inner[changed] > 0).any():
+            break
+
+        p1, p2 = points[first], points[last]
+        has_prev = (seg > 0) & (owner[kept[np.maximum(seg - 1, 0)]] == owner[first])
+        has_next = (seg + 2 < len(kept)) & (owner[kept[np.minimum(seg + 2, len(kept) - 1)]] == owner[last])
+        p0 = np.where(has_prev[:, None], points[kept[np.maximum(seg - 1, 0)]], 2 * p1 - p2)
+        p3 = np.where(has_next[:, None], points[kept[np.minimum(seg + 2, len(kept) - 1)]], 2 * p2 - p1)
+
+        # Only changed segments with dropped points need the spline
+        todo = np.flatnonzero((inner > 0) & changed)
+        curve = centripetal_segments(p0[todo], p1[todo], p2[todo], p3[todo], samples)
+
+        # Every dropped point against the sampled spline of its segment
+        counts = inner[todo]
+        which = np.repeat(np.arange(len(todo)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = first[todo][which] + 1 + offset
+        q = points[candidates]
+
+        if sources is not None and len(source_points):
+            # Source vertices of segments with dropped points vote for the
+            # nearer of their two stations that is not kept yet
+            segment_of = np.full(len(kept), -1)
+            segment_of[seg[todo]] = np.arange(len(todo))
+            source_which = segment_of[np.searchsorted(kept, source_interval, side='right') - 1]
+            inside = source_which >= 0
+            station = source_interval[inside] + (source_fraction[inside] >= 0.5)
+            station = np.where(keep[station], 2 * source_interval[inside] + 1 - station, station)
+            which = np.concatenate((which, source_which[inside]))
+            candidates = np.concatenate((candidates, station))
+            q = np.concatenate((q, source_points[inside]))
+
+        a = curve[which, :-1]
+        ab = curve[which, 1:] - a
+        q = q[:, None, :]
+        length2 = np.einsum('ijk,ijk->ij', ab, ab)
+        t = np.clip(np.divide(np.einsum('ijk,ijk->ij', q - a, ab), length2,
+                              out=np.zeros_like(length2), where=length2 > 0), 0.0, 1.0)
+        deviation = np.linalg.norm(a + ab * t[:, :, None] - q, axis=2).min(axis=1)
+
+        # Add the worst point of every segment above the tolerance
+        over = deviation > max_deviation
+        if not over.any():
+            break
+        order = np.lexsort((-deviation, which))
+        worst = order[np.concatenate(([True], which[order][1:] != which[order][:-1]))]
+        added[:] = False
+        added[candidates[worst[over[worst]]]] = True
+        keep |= added
+
+    return [points[start:start + size][keep[start:start + size]] for start, size in zip(starts, sizes)]
+
+def weld_points(points, distance):
+    """
+    Find coincident points: every pair closer than 'distance' is merged,
+    also along chains of such pairs, into the lowest index point of the
+    chain. Unlike bmesh.ops.remove_doubles the result does not depend on
+    the order the pairs are visited in.
+
+    Candidate pairs are found with a grid hash of cell size 'distance':
+    every point is compared with all points of its own cell and of the
+    neighbouring cells, the close pairs are joined with a union-find. The
+    grid helpers are shared with spatial_groups.
+
+    :param points: (N, 3) array
+    :param distance: merge distance
+    :return: (N,) int array, index of the point each point is merged into
+    """
+    count = len(points)
+    if count < 2 or distance <= 0:
+        return np.arange(count)
+
+    cells, _, order, cell_start, cell_count = bin_points(np.floor(points / distance).astype(np.int64))
+    pairs_a = []
+    pairs_b = []
+    for offset, cell_a, cell_b in neighbour_cell_pairs(cells):
+        a, b, _ = cell_point_pairs(order, cell_start, cell_count, cell_a, cell_b)
+        keep = a < b if not any(offset) else np.ones(len(a), dtype=bool)
+        pairs_a.append(a[keep])
+        pairs_b.append(b[keep])
+
+    a = np.concatenate(pairs_a)
+    b = np.concatenate(pairs_b)
+    close = np.linalg.norm(points[a] - points[b], axis=1) <= distance
+    return connected_components(count, a[close], b[close])
+
+def unique_edges(edges):
+    """
+    Drop collapsed (v, v) and duplicate edges of an (M, 2) edge array.
+    """
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    return np.unique(np.sort(edges, axis=1), axis=0)
+
+def build_adjacency(vertex_count, edges):
+    """
+    Build a CSR adjacency from an (M, 2) edge array.
+
+    :return: (offsets, neighbors, edge_ids) where the neighbours of vertex
+             v are neighbors[offsets[v]:offsets[v + 1]] and edge_ids holds
+             the matching edge index for every entry
+    """
+    ends = edges.ravel()
+    degree = np.bincount(ends, minlength=vertex_count)
+    offsets = np.concatenate(([0], np.cumsum(degree)))
+    order = np.argsort(ends, kind='stable')
+    # ends[i] belongs to edge i // 2, its other end is ends[i ^ 1]
+    neighbors = ends[order ^ 1]
+    edge_ids = order // 2
+    return offsets, neighbors, edge_ids
+
+def polylines_from_edges(points, edges, sharp_angle_threshold=90, distance=1e-1):
+    """
+    Given the vertices and edges of a mesh whose edges form one or more
+    1D graphs, return a list of polylines (each an (N, 3) array).
+
+    Splits occur at vertices of valence != 2 and at vertices where the
+    direction changes by more than 'sharp_angle_threshold' degrees.
+    Closed loops are returned with the first point repeated at the end.
+
+    Chain endpoints (vertices of valence != 2) closer than 'distance' are
+    snapped together, which joins separately modelled segments. Interior
+    chain vertices are never merged, however close they are.
+
+    :param points: (N, 3) vertex coordinates
+    :param edges: (M, 2) vertex indices
+    :param sharp_angle_threshold: split angle in degrees
+    :param distance: snap distance for chain endpoints
+    """
+    points = as_point_array(points)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if not len(edges):
+        return []
+
+    # 1. Snap chain endpoints, drop collapsed and duplicate edges
+    edges = unique_edges(edges)
+    degree = np.bincount(edges.ravel(), minlength=len(points))
+    endpoints = np.flatnonzero((degree > 0) & (degree != 2))
+    target = np.arange(len(points))
+    target[endpoints] = endpoints[weld_points(points[endpoints], distance)]
+    edges = unique_edges(target[edges])
+
+    offsets, neighbors, edge_ids = build_adjacency(len(points), edges)
+    degree = np.diff(offsets)
+
+    # 2. Sharp angle test at all valence 2 vertices at once
+    is_break = degree != 2
+    inner = np.flatnonzero(~is_break)
+    dir_in = points[inner] - points[neighbors[offsets[inner]]]
+    dir_out = points[neighbors[offsets[inner] + 1]] - points[inner]
+    norms = np.linalg.norm(dir_in, axis=1) * np.linalg.norm(dir_out, axis=1)
+    cos = np.divide(np.einsum('ij,ij->i', dir_in, dir_out), norms,
+                    out=np.ones(len(inner)), where=norms > 0)
+    is_break[inner] = cos < np.cos(np.radians(sharp_angle_threshold))
+
+    # 3. Chain decomposition: walk from break vertices, then the remaining loops
+    offsets_l = offsets.tolist()
+    neighbors_l = neighbors.tolist()
+    edge_ids_l = edge_ids.tolist()
+    is_break_l = is_break.tolist()
+    used = bytearray(len(edges))
+
+    def walk(vertex, slot):
+        chain = [vertex]
+        while True:
+            edge = edge_ids_l[slot]
+            used[edge] = 1
+            vertex = neighbors_l[slot]
+            chain.append(vertex)
+            if is_break_l[vertex]:
+                return chain
+            slot = offsets_l[vertex]
+            if edge_ids_l[slot] == edge:
+                slot += 1
+            if used[edge_ids_l[slot]]:
+                return chain  # closed loop
+
+    chains = []
+    for vertex in np.flatnonzero(is_break & (degree > 0)).tolist():
+        for slot in range(offsets_l[vertex], offsets_l[vertex + 1]):
+            if not used[edge_ids_l[slot]]:
+                chains.append(walk(vertex, slot))
+
+    for edge, (a, _) in enumerate(edges.tolist()):
+        if not used[edge]:
+            slot = offsets_l[a] if edge_ids_l[offsets_l[a]] == edge else offsets_l[a] + 1
+            chains.append(walk(a, slot))
+
+    return [points[chain] for chain in chains]
+
+# World space Bezier splines of one curve object, read without evaluating
+# it to a mesh. The control points of all splines are concatenated:
+# points, handles_left and handles_right are (N, 3), sizes and cyclic
+# hold the point count and cyclic flag of every spline.
+SplineJob = namedtuple("SplineJob", ["points", "handles_left", "handles_right", "sizes", "cyclic"])
+
+def bezier_evaluate(p0, p1, p2, p3, t):
+    """
+    Points of cubic Bezier segments at parameters 't', broadcast over the
+    leading axes of the control points and 't'.
+    """
+    s = 1.0 - t
+    return s * s * s * p0 + 3.0 * s * s * t * p1 + 3.0 * s * t * t * p2 + t * t * t * p3
+
+def sample_splines(job, target_step=5.0, sharp_angle_threshold=90, samples=32):
+    """
+    Sample the Bezier splines of a SplineJob at exact arc length stations,
+    with the same spacing rule as resample_polylines: the endpoints and
+    total_length / round(total_length / target_step) in between.
+
+    Arc length is tabulated at 'samples' parameters per segment for all
+    segments at once, stations are located in the table with searchsorted
+    and evaluated on the curve itself. Splines are split at control
+    points where the direction changes by more than
+    'sharp_angle_threshold' degrees, like polylines_from_edges does.
+    Closed splines without such a corner return their first point again
+    at the end.
+
+    :return: list of (M, 3) arrays, one per spline piece
+    """
+    sizes = np.asarray(job.sizes, dtype=np.int64)
+    cyclic = np.asarray(job.cyclic, dtype=bool)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    valid = (sizes >= 2) | (cyclic & (sizes >= 1))
+    if not valid.any():
+        return []
+
+    # 1. Segments in spline order, a cyclic spline also closes back to its start
+    seg_counts = np.where(valid, sizes - 1 + cyclic, 0)
+    spline_of = np.repeat(np.arange(len(sizes)), seg_counts)
+    local = np.arange(seg_counts.sum()) - np.repeat(np.cumsum(seg_counts) - seg_counts, seg_counts)
+    a = starts[spline_of] + local
+    b = starts[spline_of] + (local + 1) % sizes[spline_of]
+    p0, p1, p2, p3 = job.points[a], job.handles_right[a], job.handles_left[b], job.points[b]
+
+    # 2. Sharp corners at the control point starting a segment
+    eps = 1e-3
+    out_dir = bezier_evaluate(p0, p1, p2, p3, eps) - p0
+    seg_start = np.repeat(np.cumsum(seg_counts) - seg_counts, seg_counts)
+    prev = np.arange(len(a)) - 1
+    prev = np.where(local == 0, seg_start + seg_counts[spline_of] - 1, prev)
+    in_dir = p0 - bezier_evaluate(p0[prev], p1[prev], p2[prev], p3[prev], 1.0 - eps)
+    norms = np.linalg.norm(in_dir, axis=1) * np.linalg.norm(out_dir, axis=1)
+    cos = np.divide(np.einsum('ij,ij->i', in_dir, out_dir), norms, out=np.ones(len(a)), where=norms > 0)
+    has_prev = (local > 0) | cyclic[spline_of]
+    sharp = has_prev & (cos < np.cos(np.radians(sharp_angle_threshold)))
+    is_break = sharp | ((local == 0) & ~cyclic[spline_of])
+
+    # A closed spline without corners is one piece from point 0, one with
+    # corners is walked starting at its first corner
+    corners = np.bincount(spline_of, weights=sharp, minlength=len(sizes)) > 0
+    is_break |= (local == 0) & cyclic[spline_of] & ~corners[spline_of]
+    order = np.arange(len(a))
+    for spline in np.flatnonzero(cyclic & valid & corners):
+        segs = np.flatnonzero(spline_of == spline)
+        order[segs] = np.roll(segs, -np.flatnonzero(is_break[segs])[0])
+    is_break = is_break[order]
+
+    # 3. Arc length table of every segment
+    t_table = np.linspace(0.0, 1.0, samples + 1)
+    curve = bezier_evaluate(p0[:, None], p1[:, None], p2[:, None], p3[:, None], t_table[None, :, None])
+    table = np.concatenate((np.zeros((len(a), 1)), np.cumsum(np.linalg.norm(np.diff(curve, axis=1), axis=2), axis=1)), axis=1)
+    seg_lens = table[:, -1]
+
+    # 4. Pieces between breaks, their lengths and stations
+    cum = np.concatenate(([0.0], np.cumsum(seg_lens[order])))
+    piece_first = np.flatnonzero(is_break)
+    piece_start = cum[piece_first]
+    totals = np.append(piece_start[1:], cum[-1]) - piece_start
+    counts = np.maximum(1, np.rint(totals / target_step).astype(np.int64))
+    out_sizes = counts + 1
+    out_starts = np.concatenate(([0], np.cumsum(out_sizes)[:-1]))
+    owner = np.repeat(np.arange(len(counts)), out_sizes)
+    n = np.arange(out_sizes.sum()) - out_starts[owner]
+    stations = piece_start[owner] + n * (totals / counts)[owner]
+
+    # 5. Segment and parameter of every station, evaluated on the curve
+    piece_last = np.append(piece_first[1:], len(order)) - 1
+    entry = np.clip(np.searchsorted(cum[1:], stations, side='right'), piece_first[owner], piece_last[owner])
+    seg = order[entry]
+    within = np.clip(stations - cum[entry], 0.0, seg_lens[seg])
+    row = table[seg]
+    j = np.clip((row <= within[:, None]).sum(axis=1) - 1, 0, samples - 1)
+    lo, hi = row[np.arange(len(seg)), j], row[np.arange(len(seg)), j + 1]
+    frac = np.divide(within - lo, hi - lo, out=np.zeros_like(lo), where=hi > lo)
+    t = ((j + np.clip(frac, 0.0, 1.0)) / samples)[:, None]
+    result = bezier_evaluate(p0[seg], p1[seg], p2[seg], p3[seg], t)
+
+    # Piece endpoints are exactly the control points
+    result[out_starts] = p0[order[piece_first]]
+    result[out_starts + counts] = p3[order[piece_last]]
+    return np.split(result, out_starts[1:])
+
+def sample_rails(jobs, handle_distance, merge_threshold, sharp_angle_threshold=90, max_deviation=None):
+    """
+    Numeric part of the rail export for a list of objects: extract the
+    polylines of every mesh job and resample all of them in one batched
+    call, sample spline jobs directly, then add the margin handles. With
+    'max_deviation' the sampled points are thinned out to what the spline
+    needs to stay within it of the resampled points and of the mesh
+    vertices, see simplify_handles.
+
+    :param jobs: list of world space (points, edges) arrays or SplineJobs, one per object
+    :return: list with one entry per job, each a list of (N, 3) rail arrays
+    """
+    raw_polylines = []
+    slots = []
+    for job in jobs:
+        if isinstance(job, SplineJob):
+            slots.append(sample_splines(job, handle_distance, sharp_angle_threshold))
+        else:
+            polylines = polylines_from_edges(job[0], job[1], sharp_angle_threshold, merge_threshold)
+            slots.append((len(raw_polylines), len(polylines)))
+            raw_polylines.extend(polylines)
+
+    mesh_resampled = resample_polylines(raw_polylines, handle_distance)
+    per_job = [slot if isinstance(slot, list) else mesh_resampled[slot[0]:slot[0] + slot[1]] for slot in slots]
+    counts = [len(polylines) for polylines in per_job]
+
+    resampled = [polyline for polylines in per_job for polyline in polylines]
+    if max_deviation:
+        # Sampled splines lie on the curve, resampled meshes are also
+        # checked against their source vertices
+        sources = [[None] * len(slot) if isinstance(slot, list) else raw_polylines[slot[0]:slot[0] + slot[1]] for slot in slots]
+        resampled = simplify_handles(resampled, max_deviation, sources=[source for job in sources for source in job])
+    rails = [add_margins(pl) for pl in resampled]
+
+    result = []
+    start = 0
+    for count in counts:
+        result.append(rails[start:start + count])
+        start += count
+    return result
+
+def rail_job_chunks(jobs, chunk_vertices=None):
+    """
+    Split 'jobs' into contiguous chunks of at least 'chunk_vertices'
+    (default CHUNK_VERTICES) vertices, the last one may be smaller. The
+    chunks only depend on the jobs, so every worker count samples the same
+    batches.
+    """
+    chunk_vertices = chunk_vertices or CHUNK_VERTICES
+    chunks = []
+    start = 0
+    vertices = 0
+    for i, job in enumerate(jobs):
+        vertices += len(job[0])
+        if vertices >= chunk_vertices:
+            chunks.append(jobs[start:i + 1])
+            start = i + 1
+            vertices = 0
+    if start < len(jobs):
+        chunks.append(jobs[start:])
+    return chunks
+
+def sample_rails_parallel(jobs, handle_distance, merge_threshold, workers=1, max_deviation=None, warnings=None):
+    """
+    Run sample_rails on a process pool. The jobs are split into chunks by
+    rail_job_chunks and gathered back in their original order. Serial runs
+    (workers <= 1, a single chunk or when the pool cannot be started) sample
+    the same chunks one after another, so the result is bit-identical for
+    any worker count.
+
+    :param workers: number of worker processes, 0 uses all cores
+    :param warnings: list that a message is appended to when the pool fails
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = rail_job_chunks(jobs)
+    if workers > 1 and len(chunks) > 1:
+        try:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+                futures = [pool.submit(sample_rails, chunk, handle_distance, merge_threshold, max_deviation=max_deviation) for chunk in chunks]
+                results = [future.result() for future in futures]
+            return [rails for chunk_result in results for rails in chunk_result]
+        except (OSError, BrokenProcessPool) as e:
+            if warnings is not None:
+                warnings.append(f"Rail sampling pool failed ({e}), sampled serially instead.")
+
+    return [rails for chunk in chunks
+            for rails in sample_rails(chunk, handle_distance, merge_threshold, max_deviation=max_deviation)]
@@ -0,0 +1,188 @@
+import numpy as np
+
+# Candidate point pairs tested at once by proximity_groups
+PAIR_CHUNK_SIZE = 4_000_000
+
+def _first_seen_labels(labels):
+    # Renumber labels 0..k-1 in the order they first appear
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse.reshape(-1)]
+
+def _cell_keys(points, cell_size, classes):
+    keys = np.floor(np.asarray(points, dtype=np.float64) / cell_size).astype(np.int64)
+    if classes is not None:
+        keys = np.column_stack((keys, np.asarray(classes, dtype=np.int64)))
+    return keys
+
+def grid_groups(points, cell_size, classes=None):
+    """
+    Group points by the grid cell of edge 'cell_size' they fall into.
+    With 'classes' (one integer per point) only points of the same class
+    share a group.
+
+    :return: (N,) int array, group index per point, numbered in the order
+             the groups first appear
+    """
+    if not len(points):
+        return np.zeros(0, dtype=np.int64)
+    _, inverse = np.unique(_cell_keys(points, cell_size, classes), axis=0, return_inverse=True)
+    return _first_seen_labels(inverse.reshape(-1))
+
+def bin_points(keys):
+    """
+    Sort points into the grid cells given by their integer 'keys', one
+    row per point.
+
+    :return: (cells, cell_of, order, cell_start, cell_count): the unique
+             cells as sorted by np.unique and the cell of every point; the
+             points of cell c are order[cell_start[c]:cell_start[c] + cell_count[c]]
+    """
+    cells, cell_of = np.unique(keys, axis=0, return_inverse=True)
+    cell_of = cell_of.reshape(-1)
+    order = np.argsort(cell_of, kind='stable')
+    cell_start = np.searchsorted(cell_of[order], np.arange(len(cells)))
+    cell_count = np.bincount(cell_of, minlength=len(cells))
+    return cells, cell_of, order, cell_start, cell_count
+
+def _packing_strides(cells, reach):
+    # Strides packing non-negative cells and their neighbours up to 'reach'
+    # cells away into one int64, or None if that would overflow
+    extent = cells.max(axis=0) + reach + 1
+    if np.prod(extent.astype(np.float64)) >= 2.0 ** 62:
+        return None
+    return np.concatenate((np.cumprod(extent[::-1])[::-1][1:], [1])).astype(np.int64)
+
+def neighbour_cell_pairs(cells, reach=1, axes=None):
+    """
+    Yield (offset, cell_a, cell_b) for the offsets from -reach to reach
+    along the first 'axes' columns (all by default, the others stay
+    equal), each unordered pair of cells once and the zero offset
+    included: cells[cell_b] == cells[cell_a] + offset. 'cells' are unique
+    integer rows as sorted by np.unique.
+
+    Every column is compressed first, gaps of more than 'reach' cells
+    shrink to reach + 1, so the cells can be packed into one int64 unless
+    the grid is huge. Then the rows are searched as structured values,
+    which is slower but cannot overflow.
+    """
+    columns = cells.shape[1]
+    axes = columns if axes is None else axes
+    compressed = np.empty_like(cells)
+    for column in range(columns):
+        values, inverse = np.unique(cells[:, column], return_inverse=True)
+        steps = np.minimum(np.diff(values), reach + 1)
+        compressed[:, column] = np.concatenate(([reach], reach + np.cumsum(steps)))[inverse.reshape(-1)]
+
+    strides = _packing_strides(compressed, reach)
+    if strides is not None:
+        keys = compressed @ strides
+    else:
+        row = np.dtype([(f"f{column}", np.int64) for column in range(columns)])
+        keys = np.ascontiguousarray(compressed).view(row).reshape(-1)
+
+    for offset in np.ndindex(*(2 * reach + 1,) * axes):
+        offset = tuple(value - reach for value in offset) + (0,) * (columns - axes)
+        if offset < (0,) * columns:
+            continue
+        if strides is not None:
+            wanted = keys + np.array(offset) @ strides
+        else:
+            wanted = np.ascontiguousarray(compressed + offset).view(row).reshape(-1)
+        neighbour = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        cell_a = np.nonzero(keys[neighbour] == wanted)[0]
+        yield offset, cell_a, neighbour[cell_a]
+
+def cell_point_pairs(order, cell_start, cell_count, cell_a, cell_b):
+    """
+    Every point pair of the cell pairs (cell_a[i], cell_b[i]), see
+    bin_points. Returns (a, b, i) with the point indices and the cell
+    pair of every point pair.
+    """
+    sizes = cell_count[cell_a] * cell_count[cell_b]
+    pair = np.repeat(np.arange(len(cell_a)), sizes)
+    # Position of every point pair within its cell pair
+    local = np.arange(len(pair)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    a = order[cell_start[cell_a[pair]] + local // cell_count[cell_b[pair]]]
+    b = order[cell_start[cell_b[pair]] + local % cell_count[cell_b[pair]]]
+    return a, b, pair
+
+def connected_components(count, a, b):
+    """
+    Component of every node of a graph with 'count' nodes and the edges
+    (a[i], b[i]): hook the larger root onto the smaller one, then compress
+    the paths, until no edge joins two roots.
+
+    :return: (count,) int array, the lowest node index of each component
+    """
+    parent = np.arange(count)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        apart = root_a != root_b
+        if not apart.any():
+            break
+        a, b = a[apart], b[apart]
+        np.minimum.at(parent, np.maximum(root_a, root_b)[apart], np.minimum(root_a, root_b)[apart])
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+def proximity_groups(points, distance, classes=None):
+    """
+    Single linkage clustering: points closer than 'distance' to any point
+    of a group belong to it. With 'classes' only points of the same class
+    are linked.
+
+    Points are binned into cells of edge distance / sqrt(3), so all points
+    of a cell are within 'distance' of each other and form one group
+    without testing them. Only pairs from cells up to two cells apart are
+    tested, in chunks of PAIR_CHUNK_SIZE.
+
+    :return: (N,) int array, group index per point, numbered in the order
+             the groups first appear
+    """
+    count = len(points)
+    if not count:
+        return np.zeros(0, dtype=np.int64)
+    if distance <= 0:
+        raise ValueError("The grouping distance must be positive")
+    points = np.asarray(points, dtype=np.float64)
+
+    keys = _cell_keys(points, distance / np.sqrt(3.0), classes)
+    cells, cell_of, order, cell_start, cell_count = bin_points(keys)
+
+    link_a = []
+    link_b = []
+    for offset, cell_a, cell_b in neighbour_cell_pairs(cells, reach=2, axes=3):
+        if not any(offset) or not len(cell_a):
+            continue
+        linked = _linked_cells(points, order, cell_start, cell_count, cell_a, cell_b, distance)
+        link_a.append(cell_a[linked])
+        link_b.append(cell_b[linked])
+
+    if link_a:
+        components = connected_components(len(cells), np.concatenate(link_a), np.concatenate(link_b))
+    else:
+        components = np.arange(len(cells))
+    return _first_seen_labels(components[cell_of])
+
+def _linked_cells(points, order, cell_start, cell_count, cell_a, cell_b, distance):
+    # Mask of the cell pairs with at least one point pair within 'distance'
+    pairs = cell_count[cell_a] * cell_count[cell_b]
+    linked = np.zeros(len(cell_a), dtype=bool)
+    ends = np.cumsum(pairs)
+    start = 0
+    while start < len(cell_a):
+        stop = max(start + 1, int(np.searchsorted(ends, ends[start] - pairs[start] + PAIR_CHUNK_SIZE, side='right')))
+        chunk = np.arange(start, stop)
+        a, b, pair = cell_point_pairs(order, cell_start, cell_count, cell_a[chunk], cell_b[chunk])
+        close = np.einsum('ij,ij->i', points[a] - points[b], points[a] - points[b]) <= distance * distance
+        linked[chunk[pair[close]]] = True
+        start = stop
+    return linked
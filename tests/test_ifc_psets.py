@@ -0,0 +1,67 @@
+"""
+ifc_psets.write_shared_psets replacing existing property sets. Needs
+ifcopenshell.
+"""
+import os
+import sys
+
+import pytest
+
+ifcopenshell = pytest.importorskip("ifcopenshell")
+import ifcopenshell.api
+import ifcopenshell.util.element
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ifc_psets import write_shared_psets
+
+MEASURE_TYPES = {"Grouping": "IfcLabel"}
+
+def make_file(count):
+    ifc_file = ifcopenshell.api.run("project.create_file", version="IFC4")
+    ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcProject")
+    walls = [ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcWall") for _ in range(count)]
+    return ifc_file, walls
+
+def share_over_two_relations(ifc_file, walls):
+    # One property set defined by two IfcRelDefinesByProperties
+    pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=walls[0], name="Custom_dProB_Grouping")
+    ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties={"Grouping": "Group#1"})
+    ifc_file.create_entity("IfcRelDefinesByProperties", GlobalId=ifcopenshell.guid.new(),
+                           RelatedObjects=walls[1:], RelatingPropertyDefinition=pset)
+    assert len(pset.DefinesOccurrence) == 2
+    return pset
+
+def grouping(wall):
+    return ifcopenshell.util.element.get_pset(wall, "Custom_dProB_Grouping", "Grouping")
+
+def test_replace_pset_of_several_relations():
+    ifc_file, walls = make_file(3)
+    pset_id = share_over_two_relations(ifc_file, walls).id()
+
+    write_shared_psets(ifc_file, "Custom_dProB_Grouping", [(wall, {"Grouping": "Group#2"}) for wall in walls], MEASURE_TYPES)
+    assert [grouping(wall) for wall in walls] == ["Group#2"] * 3
+    with pytest.raises(RuntimeError):
+        ifc_file.by_id(pset_id)
+    assert all(relation.RelatedObjects for relation in ifc_file.by_type("IfcRelDefinesByProperties"))
+
+def test_keep_pset_still_used_elsewhere():
+    ifc_file, walls = make_file(3)
+    pset = share_over_two_relations(ifc_file, walls)
+
+    # walls[0] is alone in its relation, walls[2] keeps the old group
+    write_shared_psets(ifc_file, "Custom_dProB_Grouping", [(walls[0], {"Grouping": "Group#2"}), (walls[1], {"Grouping": "Group#2"})], MEASURE_TYPES)
+    assert [grouping(wall) for wall in walls] == ["Group#2", "Group#2", "Group#1"]
+    assert [list(relation.RelatedObjects) for relation in pset.DefinesOccurrence] == [[walls[2]]]
+    assert all(relation.RelatedObjects for relation in ifc_file.by_type("IfcRelDefinesByProperties"))
+
+def test_type_pset_is_overridden_not_removed():
+    ifc_file, walls = make_file(1)
+    wall_type = ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcWallType")
+    ifcopenshell.api.run("type.assign_type", ifc_file, related_objects=walls, relating_type=wall_type)
+    pset = ifcopenshell.api.run("pset.add_pset", ifc_file, product=wall_type, name="Custom_dProB_Grouping")
+    ifcopenshell.api.run("pset.edit_pset", ifc_file, pset=pset, properties={"Grouping": "Group#1"})
+
+    write_shared_psets(ifc_file, "Custom_dProB_Grouping", [(walls[0], {"Grouping": "Group#2"})], MEASURE_TYPES)
+    assert grouping(walls[0]) == "Group#2"
+    assert grouping(wall_type) == "Group#1"
@@ -0,0 +1,128 @@
+"""
+Parity of rail_geometry.polylines_from_edges with the dict-of-sets graph
+walker it replaced in export_rail_asset.py. The walker is kept here as a
+plain Python transliteration (without the bmesh weld, the test graphs
+have no coincident vertices), run with:
+
+    python -m pytest tests
+"""
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rail_geometry import polylines_from_edges
+
+def angle(a, b):
+    cos = sum(x * y for x, y in zip(a, b)) / (math.hypot(*a) * math.hypot(*b))
+    return math.acos(max(-1.0, min(1.0, cos)))
+
+def extract_polylines(points, edges, sharp_angle_threshold=90):
+    # The former implementation, with index tuples in place of bmesh
+    adjacency = {}
+    for v1, v2 in edges:
+        adjacency.setdefault(v1, set()).add(v2)
+        adjacency.setdefault(v2, set()).add(v1)
+
+    unused_edges = {frozenset((v1, v2)) for v1, v2 in edges}
+    polylines = []
+
+    def walk(start_idx, prev_idx=None):
+        path = [start_idx]
+        current = start_idx
+
+        while True:
+            neighbors = [v for v in adjacency[current] if v != prev_idx]
+            if len(neighbors) != 1:
+                break
+
+            next_idx = neighbors[0]
+            edge_key = frozenset((current, next_idx))
+            if edge_key not in unused_edges:
+                break
+
+            if prev_idx is not None:
+                dir1 = [c - p for c, p in zip(points[current], points[prev_idx])]
+                dir2 = [n - c for n, c in zip(points[next_idx], points[current])]
+                if math.degrees(angle(dir1, dir2)) > sharp_angle_threshold:
+                    break
+
+            unused_edges.remove(edge_key)
+            path.append(next_idx)
+            prev_idx, current = current, next_idx
+
+        return path
+
+    endpoints = [vid for vid, nbrs in adjacency.items() if len(nbrs) == 1]
+    for ep in endpoints:
+        for neighbor in adjacency[ep]:
+            edge_key = frozenset((ep, neighbor))
+            if edge_key in unused_edges:
+                unused_edges.remove(edge_key)
+                path = walk(neighbor, prev_idx=ep)
+                polylines.append([ep] + path)
+
+    while unused_edges:
+        edge = next(iter(unused_edges))
+        a, b = tuple(edge)
+        unused_edges.remove(edge)
+        forward = walk(b, prev_idx=a)
+        backward = walk(a, prev_idx=b)
+        backward.reverse()
+        full = backward[:-1] + [a] + forward
+        polylines.append(full)
+
+    return polylines
+
+def canonical(chain):
+    # Same key for both directions, and for every start point of a loop
+    chain = tuple(chain)
+    if len(chain) > 2 and chain[0] == chain[-1]:
+        ring = chain[:-1]
+        rotations = [ring[i:] + ring[:i] for i in range(len(ring))]
+        rotations += [tuple(reversed(rotation)) for rotation in rotations]
+        return ("loop", min(rotations))
+    return ("open", min(chain, tuple(reversed(chain))))
+
+def random_graph(rng):
+    """
+    Smooth random walks joined into branches and closed loops, with some
+    sharp turns. Vertices are never coincident.
+    """
+    points = []
+    edges = []
+    for _ in range(int(rng.integers(1, 8))):
+        size = int(rng.integers(2, 40))
+        direction = rng.normal(size=3)
+        start = len(points)
+        position = rng.uniform(-100.0, 100.0, 3)
+        for i in range(size):
+            # Mostly gentle bends, now and then a turn of more than 90 degrees
+            direction = direction + rng.normal(0.0, 2.0 if rng.random() < 0.1 else 0.2, 3)
+            position = position + direction / np.linalg.norm(direction)
+            points.append(position)
+            if i:
+                edges.append((start + i - 1, start + i))
+        if size > 3 and rng.random() < 0.5:
+            edges.append((start + size - 1, start))
+    # Branches between the walks
+    for _ in range(int(rng.integers(0, 6))):
+        a, b = (int(v) for v in rng.integers(0, len(points), 2))
+        if a != b and (a, b) not in edges and (b, a) not in edges:
+            edges.append((a, b))
+    return np.array(points), edges
+
+@pytest.mark.parametrize("seed", range(100))
+def test_same_polylines_as_old_walker(seed):
+    rng = np.random.default_rng(seed)
+    points, edges = random_graph(rng)
+    threshold = float(rng.choice([45.0, 90.0, 135.0]))
+
+    expected = sorted(canonical(chain) for chain in extract_polylines(points.tolist(), edges, threshold))
+    index = {tuple(point): i for i, point in enumerate(points.tolist())}
+    actual = polylines_from_edges(points, np.array(edges), threshold, distance=1e-9)
+    assert sorted(canonical(index[tuple(point)] for point in chain.tolist()) for chain in actual) == expected
@@ -0,0 +1,76 @@
+"""
+Parity of rail_geometry.resample_polylines with the per-polyline
+Vector.lerp loop it replaced in export_rail_asset.py. The loop is kept
+here as a plain Python transliteration, run with:
+
+    python -m pytest tests
+"""
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rail_geometry import resample_polylines
+
+def lerp(a, b, t):
+    return tuple(x + (y - x) * t for x, y in zip(a, b))
+
+def resample_polyline_at_fixed_interval(polyline, target_step=5.0):
+    # The former implementation, with tuples in place of mathutils.Vector
+    if len(polyline) < 2:
+        return list(polyline)
+
+    seg_lens = [math.dist(polyline[i], polyline[i + 1]) for i in range(len(polyline) - 1)]
+    total_length = sum(seg_lens)
+    count = max(1, int(round(total_length / target_step)))
+    step = total_length / count
+
+    resampled = [polyline[0]]
+    seg_idx = 0
+    seg_acc = 0.0
+    for n in range(1, count):
+        target_d = n * step
+        while seg_idx < len(seg_lens) and (seg_acc + seg_lens[seg_idx]) < target_d:
+            seg_acc += seg_lens[seg_idx]
+            seg_idx += 1
+        if seg_idx >= len(seg_lens):
+            resampled.append(polyline[-1])
+            continue
+        local_t = (target_d - seg_acc) / seg_lens[seg_idx]
+        resampled.append(lerp(polyline[seg_idx], polyline[seg_idx + 1], local_t))
+
+    resampled.append(polyline[-1])
+    return resampled
+
+def random_polyline(rng):
+    count = int(rng.integers(2, 200))
+    steps = rng.normal(0.0, rng.uniform(0.1, 20.0), (count - 1, 3))
+    start = rng.uniform(-1000.0, 1000.0, 3)
+    return np.vstack((start, start + np.cumsum(steps, axis=0)))
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("target_step", [0.5, 5.0, 37.0])
+def test_resample_matches_vector_loop(seed, target_step):
+    rng = np.random.default_rng(seed)
+    polylines = [random_polyline(rng) for _ in range(int(rng.integers(1, 30)))]
+
+    # All polylines in one batch, as the export calls it
+    result = resample_polylines(polylines, target_step)
+
+    assert len(result) == len(polylines)
+    for polyline, resampled in zip(polylines, result):
+        expected = np.array(resample_polyline_at_fixed_interval([tuple(p) for p in polyline], target_step))
+        assert resampled.shape == expected.shape
+        assert np.array_equal(resampled[0], polyline[0])
+        assert np.array_equal(resampled[-1], polyline[-1])
+        np.testing.assert_allclose(resampled, expected, rtol=0.0, atol=1e-9)
+
+def test_short_polylines_are_unchanged():
+    single = np.array([[1.0, 2.0, 3.0]])
+    result = resample_polylines([single, np.zeros((0, 3))], 5.0)
+    assert np.array_equal(result[0], single)
+    assert len(result[1]) == 0
@@ -0,0 +1,46 @@
+"""
+rail_geometry.sample_rails_parallel gives bit-identical rails for every
+worker count.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rail_geometry
+from rail_geometry import rail_job_chunks, sample_rails_parallel
+
+def make_jobs(seed, count=12):
+    # Open wiggly polylines as (points, edges) mesh jobs, far from the origin
+    rng = np.random.default_rng(seed)
+    jobs = []
+    for _ in range(count):
+        size = int(rng.integers(20, 200))
+        points = np.cumsum(rng.normal(0.0, 3.0, (size, 3)), axis=0) + rng.uniform(-1e5, 1e5, 3)
+        edges = np.column_stack((np.arange(size - 1), np.arange(1, size)))
+        jobs.append((points, edges))
+    return jobs
+
+def test_chunks_cover_jobs_in_order():
+    jobs = make_jobs(0, 40)
+    chunks = rail_job_chunks(jobs, chunk_vertices=500)
+    assert len(chunks) > 1
+    assert [job for chunk in chunks for job in chunk] == jobs
+    assert all(sum(len(job[0]) for job in chunk) >= 500 for chunk in chunks[:-1])
+
+@pytest.mark.parametrize("seed", range(3))
+def test_workers_bit_identical(seed, monkeypatch):
+    monkeypatch.setattr(rail_geometry, "CHUNK_VERTICES", 300)
+    jobs = make_jobs(seed)
+    serial = sample_rails_parallel(jobs, 5.0, 0.001, workers=1)
+    warnings = []
+    parallel = sample_rails_parallel(jobs, 5.0, 0.001, workers=2, warnings=warnings)
+    assert not warnings
+    assert len(serial) == len(parallel) == len(jobs)
+    for serial_rails, parallel_rails in zip(serial, parallel):
+        assert len(serial_rails) == len(parallel_rails)
+        for a, b in zip(serial_rails, parallel_rails):
+            assert np.array_equal(a, b)
@@ -0,0 +1,55 @@
+"""
+rail_geometry.simplify_handles keeps the spline within the tolerance of
+the source vertices between the resampled stations.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rail_geometry import centripetal_segments, resample_polylines, simplify_handles
+
+SAMPLES = 8
+
+def spline_distance(handles, points):
+    # Distance of every point to the sampled spline through 'handles'
+    padded = np.vstack((2 * handles[0] - handles[1], handles, 2 * handles[-1] - handles[-2]))
+    curve = centripetal_segments(padded[:-3], padded[1:-2], padded[2:-1], padded[3:], SAMPLES).reshape(-1, 3)
+    a, ab = curve[:-1], curve[1:] - curve[:-1]
+    q = points[:, None, :]
+    t = np.clip(np.einsum('ijk,jk->ij', q - a, ab) / np.maximum(np.einsum('jk,jk->j', ab, ab), 1e-300), 0.0, 1.0)
+    return np.linalg.norm(a + ab * t[:, :, None] - q, axis=2).min(axis=1)
+
+def test_bump_between_stations():
+    # Straight track with a 5 cm kink between the stations at 50 and 55 m
+    source = np.array([[0.0, 0.0, 0.0], [52.0, 0.0, 0.0], [52.5, 0.05, 0.0], [53.0, 0.0, 0.0], [100.0, 0.0, 0.0]])
+    resampled = resample_polylines([source], 5.0)[0]
+
+    assert len(simplify_handles([resampled], 0.02)[0]) == 2
+    kept = simplify_handles([resampled], 0.02, sources=[source])[0]
+    assert len(kept) > 2
+    assert np.isin(resampled[[10, 11]], kept).all(axis=1).all()
+
+@pytest.mark.parametrize("seed", range(10))
+def test_source_vertices_within_tolerance(seed):
+    rng = np.random.default_rng(seed)
+    sources = []
+    for _ in range(5):
+        # Curves with radii down to about 20 m and vertices every metre
+        heading = np.cumsum(rng.normal(0.0, 0.05, 300))
+        source = np.cumsum(np.column_stack((np.cos(heading), np.sin(heading), np.zeros_like(heading))), axis=0)
+        sources.append(source + rng.normal(0.0, 0.01, source.shape))
+    resampled = resample_polylines(sources, 5.0)
+    simplified = simplify_handles(resampled, 0.02, samples=SAMPLES, sources=sources)
+
+    for source, stations, handles in zip(sources, resampled, simplified):
+        kept = np.flatnonzero(np.isin(stations, handles).all(axis=1))
+        # Station interval of every source vertex, by arc length
+        arc = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(source, axis=0), axis=1))))
+        interval = np.minimum((arc / arc[-1] * (len(stations) - 1)).astype(int), len(stations) - 2)
+        both_kept = np.isin(interval, kept) & np.isin(interval + 1, kept)
+        deviation = spline_distance(handles, source)
+        assert (deviation[~both_kept] <= 0.02 + 1e-9).all()
@@ -0,0 +1,42 @@
+"""
+spatial_groups.proximity_groups against a brute force single linkage.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_groups import connected_components, proximity_groups
+
+def brute_force_groups(points, distance, classes=None):
+    # Group of every point, numbered in the order the groups first appear
+    count = len(points)
+    close = np.linalg.norm(points[:, None] - points[None], axis=2) <= distance
+    if classes is not None:
+        close &= classes[:, None] == classes[None]
+    a, b = np.nonzero(np.triu(close, 1))
+    roots = connected_components(count, a, b)
+    _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse]
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("with_classes", [False, True])
+def test_matches_brute_force(seed, with_classes):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0.0, 10.0, (300, 3)) * [1.0, 1.0, 0.2]
+    classes = rng.integers(0, 3, len(points)) if with_classes else None
+    assert np.array_equal(proximity_groups(points, 0.8, classes), brute_force_groups(points, 0.8, classes))
+
+def test_large_site_small_distance():
+    # Far more cells than fit into one packed int64 key before compression
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0.0, 1.0, (500, 3)) * [1e6, 1e6, 1e3]
+    points = np.concatenate((points, points[:50] + 0.0005))
+    labels = proximity_groups(points, 0.001)
+    assert np.array_equal(labels[500:], labels[:50])
+    assert len(np.unique(labels)) == 500
@@ -0,0 +1,68 @@
+"""
+rail_geometry.weld_points against a brute force O(n^2) weld.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spatial_groups
+from rail_geometry import weld_points
+
+def brute_force_weld(points, distance):
+    # Lowest index of every chain of points closer than 'distance'
+    count = len(points)
+    target = list(range(count))
+
+    def root(i):
+        while target[i] != i:
+            i = target[i]
+        return i
+
+    for i in range(count):
+        for j in range(i + 1, count):
+            if np.linalg.norm(points[i] - points[j]) <= distance:
+                ri, rj = root(i), root(j)
+                target[max(ri, rj)] = min(ri, rj)
+    return np.array([root(i) for i in range(count)])
+
+@pytest.mark.parametrize("seed", range(30))
+def test_weld_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(2, 300))
+    points = rng.uniform(0.0, rng.uniform(0.2, 5.0), (count, 3))
+    # Exact duplicates as well, like the coincident endpoints of rail segments
+    points[rng.integers(0, count, count // 5)] = points[rng.integers(0, count, count // 5)]
+    distance = 0.1
+    np.testing.assert_array_equal(weld_points(points, distance), brute_force_weld(points, distance))
+
+def test_weld_points_on_a_line():
+    # Points 0.08 apart are welded even when they sit in different cells
+    t = np.array([0, 0, 1, 2, 3, 4, 5, 6, 7]) * 0.08
+    points = np.column_stack((t, np.zeros_like(t), np.zeros_like(t)))
+    np.testing.assert_array_equal(weld_points(points, 0.1), np.zeros(len(t), dtype=int))
+
+def test_weld_points_without_pairs():
+    points = np.arange(12, dtype=float).reshape(4, 3)
+    np.testing.assert_array_equal(weld_points(points, 0.1), np.arange(4))
+    np.testing.assert_array_equal(weld_points(points[:1], 0.1), [0])
+
+def test_large_site_small_distance():
+    # 20 km x 20 km x 100 m at 1 mm used to overflow the packed cell keys
+    rng = np.random.default_rng(7)
+    points = rng.uniform(0.0, 1.0, (2000, 3)) * [20000.0, 20000.0, 100.0]
+    points = np.concatenate((points, points[:20] + 0.0002))
+    target = weld_points(points, 0.001)
+    assert np.array_equal(target[2000:], np.arange(20))
+    assert np.array_equal(target[:2000], np.arange(2000))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_unpacked_cells_match_brute_force(seed, monkeypatch):
+    # Grids too large to pack are searched as structured rows
+    monkeypatch.setattr(spatial_groups, "_packing_strides", lambda cells, reach: None)
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-1.0, 1.0, (150, 3))
+    assert np.array_equal(weld_points(points, 0.2), brute_force_weld(points, 0.2))
@@ -0,0 +1,47 @@
+"""
+dasset_writer.write_dasset only replaces the target once the archive is
+complete.
+"""
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dasset_writer import rail_dicts, write_dasset
+
+GEOLOCATION = {"East": 0.0, "Elevation": 0.0, "North": 0.0}
+
+def make_rails(count):
+    rng = np.random.default_rng(0)
+    return [(f"Rail {i}", [rng.normal(0.0, 10.0, (8, 3))]) for i in range(count)]
+
+def test_writes_complete_archive(tmp_path):
+    path = str(tmp_path / "rails.dasset")
+    stats = write_dasset(path, "rails", GEOLOCATION, rail_dicts(make_rails(5)))
+    assert stats["rails"] == 5
+    assert stats["bytes"] == os.path.getsize(path)
+    assert not os.path.exists(path + ".tmp")
+    with zipfile.ZipFile(path) as zip_file:
+        assert json.loads(zip_file.read("model.json"))
+        assert "asset_guid.txt" in zip_file.namelist()
+
+def test_failed_export_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "rails.dasset")
+    write_dasset(path, "rails", GEOLOCATION, rail_dicts(make_rails(3)))
+    with open(path, "rb") as f:
+        previous = f.read()
+
+    def failing(rails):
+        yield from rails[:2]
+        raise RuntimeError("evaluation failed")
+
+    with pytest.raises(RuntimeError):
+        write_dasset(path, "rails", GEOLOCATION, rail_dicts(failing(make_rails(5))))
+    with open(path, "rb") as f:
+        assert f.read() == previous
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,137 @@
+import bpy
+import csv
+import json
+import time
+from bpy_extras.io_utils import ExportHelper
+from mathutils.bvhtree import BVHTree
+from .instrumentation import OperatorRun, instrumented
+from .lazy_import import lazy_import
+
+mesh_metrics = lazy_import(".mesh_metrics", __package__)
+
+REPORT_FIELDS = [
+    "object", "mesh", "bulk_material", "triangles", "boundary_edges", "non_manifold_edges",
+    "flipped_edges", "inverted", "self_intersections", "watertight", "volume", "valid",
+]
+
+def self_intersections(points, triangles):
+    """
+    Number of intersecting triangle pairs. Triangles sharing a vertex are
+    not tested against each other, so pass welded triangles.
+    """
+    if not len(triangles):
+        return 0
+    tree = BVHTree.FromPolygons(points.tolist(), triangles.tolist(), all_triangles=True)
+    return len(tree.overlap(tree))
+
+def validate_mesh(mesh):
+    """
+    Check the local geometry of a Mesh datablock for holes, non-manifold
+    and flipped edges, inverted normals and self-intersections.
+    """
+    points, triangles = mesh_metrics.read_mesh_triangles(mesh)
+    welded = mesh_metrics.welded_triangles(points, triangles)
+    row = mesh_metrics.mesh_defects(points, triangles, welded=welded)
+    row["triangles"] = len(triangles)
+    row["self_intersections"] = self_intersections(points, welded)
+    return row
+
+def validate_bulk(context, objects, run=None):
+    """
+    Validation rows for every mesh object in 'objects'. Unmodified
+    objects sharing a mesh are checked once, objects with modifiers on
+    their evaluated mesh. The volume is the world space volume the bulk
+    properties are written from.
+    """
+    run = run or OperatorRun(ValidateBulkOperator.bl_label)
+    depsgraph = context.evaluated_depsgraph_get()
+    checked = {}
+    rows = []
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+
+        with run.stage("check"):
+            if obj.modifiers:
+                eval_obj = obj.evaluated_get(depsgraph)
+                try:
+                    result = validate_mesh(eval_obj.to_mesh())
+                finally:
+                    eval_obj.to_mesh_clear()
+            else:
+                if obj.data not in checked:
+                    checked[obj.data] = validate_mesh(obj.data)
+                result = checked[obj.data]
+
+        # Local volume scaled by the object transform
+        volume = result["signed_volume"] * obj.matrix_world.to_3x3().determinant()
+        inverted = volume < 0
+        valid = (result["watertight"] and not result["flipped_edges"] and not inverted
+                 and not result["self_intersections"])
+        rows.append({
+            "object": obj.name,
+            "mesh": obj.data.name,
+            "bulk_material": obj.get("BulkMaterial", ""),
+            "triangles": result["triangles"],
+            "boundary_edges": result["boundary_edges"],
+            "non_manifold_edges": result["non_manifold_edges"],
+            "flipped_edges": result["flipped_edges"],
+            "inverted": inverted,
+            "self_intersections": result["self_intersections"],
+            "watertight": result["watertight"],
+            "volume": volume,
+            "valid": valid,
+        })
+    run.count(objects=len(rows), meshes=len(checked), invalid=sum(not row["valid"] for row in rows))
+    return rows
+
+def write_report(filepath, rows):
+    # JSON for .json paths, CSV otherwise
+    if filepath.lower().endswith(".json"):
+        with open(filepath, "w") as f:
+            json.dump(rows, f, indent=4)
+    else:
+        with open(filepath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+class ValidateBulkOperator(bpy.types.Operator, ExportHelper):
+    """Check the selected bulk bodies for holes, flipped normals and self-intersections and write a report"""
+    bl_idname = "object.validate_bulk_operator"
+    bl_label = "Validate Bulk Bodies"
+    filename_ext = ".csv"
+    check_extension = None
+
+    filter_glob: bpy.props.StringProperty(default="*.csv;*.json", options={'HIDDEN'})
+
+    @instrumented
+    def execute(self, context):
+        start = time.perf_counter()
+        rows = validate_bulk(context, context.selected_objects, self._run)
+        if not rows:
+            self.report({'INFO'}, "No mesh objects selected.")
+            return {'CANCELLED'}
+
+        try:
+            with self._run.stage("write"):
+                write_report(self.filepath, rows)
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to write file: {e}")
+            return {'CANCELLED'}
+
+        invalid = [row for row in rows if not row["valid"]]
+        for row in invalid:
+            print(f"{row['object']}: {row['boundary_edges']} boundary, {row['non_manifold_edges']} non-manifold, "
+                  f"{row['flipped_edges']} flipped edges, inverted: {row['inverted']}, "
+                  f"{row['self_intersections']} self-intersections")
+        level = {'WARNING'} if invalid else {'INFO'}
+        self.report(level, f"{len(invalid)} of {len(rows)} bulk bodies are not valid closed volumes "
+                           f"({time.perf_counter() - start:.1f}s). Report written to {self.filepath}.")
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(ValidateBulkOperator)
+
+def unregister():
+    bpy.utils.unregister_class(ValidateBulkOperator)